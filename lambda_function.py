@@ -4,35 +4,84 @@ from ask_sdk_core.handler_input import HandlerInput
 from ask_sdk_model import Response, LaunchRequest, IntentRequest, SessionEndedRequest
 from ask_sdk_core.utils import is_intent_name
 import pymongo
+from pymongo import UpdateOne, WriteConcern
 import os
 import logging
 from datetime import datetime
-from datetime import datetime
 from zoneinfo import ZoneInfo
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import json
 import random
 import re
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, TypedDict
 
 # Configure logging for debugging and tracking errors
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Thread pool for running independent Gemini/MongoDB calls concurrently (network-bound, so threads are enough)
+io_executor = ThreadPoolExecutor(max_workers=4)
+
+# Timezone used for session and response timestamps
+MELBOURNE_TZ = ZoneInfo("Australia/Melbourne")
+
 # MongoDB connection setup 
 MONGO_URI = os.getenv("MONGO_URI")  # Retrieve MongoDB connection string from environment variables
 if not MONGO_URI:
     raise ValueError("MongoDB connection string is missing. Set MONGO_URI in Lambda environment variables.")
 
+# Create the client once per container so warm invocations reuse the same connection.
+# connect=False defers the TCP/TLS handshake to the first operation; the small pool
+# keeps Atlas connection counts bounded when many containers are running while
+# still allowing two concurrent operations from io_executor.
+mongo_client = pymongo.MongoClient(
+    MONGO_URI,
+    tls=True,
+    tlsAllowInvalidCertificates=False,
+    maxPoolSize=2,
+    minPoolSize=1,  # Keep one connection open between warm invocations
+    serverSelectionTimeoutMS=3000,
+    connectTimeoutMS=3000,
+    socketTimeoutMS=5000,
+    heartbeatFrequencyMS=30000,  # Fewer background server checks between turns; retryWrites covers failovers
+    appname="alexa-intake",  # Identifies this skill's connections in Atlas
+    retryWrites=True,
+    compressors="zstd,zlib",  # Compress wire messages; the client uses whichever the server also supports
+    zlibCompressionLevel=6,
+    connect=False
+)
+
 def get_db():
-    """Returns a single MongoDB connection to be reused across functions"""
-    if not hasattr(get_db, "client"):
-        get_db.client = pymongo.MongoClient(MONGO_URI, tls=True, tlsAllowInvalidCertificates=False) # Connect to MongoDB
-    return get_db.client['test'] # Return the database
+    """Returns the shared MongoDB database to be reused across functions"""
+    return mongo_client['test'] # Return the database
 
 db = get_db()
 collection = db['questions']
 
+# Per-turn answer saves only need the primary's acknowledgement, which avoids waiting for
+# replication on every write. Counters keep majority writes: a counter increment lost in a
+# failover rollback would hand out the same session/patient ID again.
+FAST_WRITE_CONCERN = WriteConcern(w=1, j=False)
+DURABLE_WRITE_CONCERN = WriteConcern(w="majority")
+counters_collection = db.get_collection('counters', write_concern=DURABLE_WRITE_CONCERN)
+patient_collection = db.get_collection('patients', write_concern=FAST_WRITE_CONCERN)
+
+# Make sure the 'patients' lookups used by save_patient_data are indexed
+def ensure_indexes():
+    """Creates the 'patients' index on (session_id, patient_id, response.question_id); a no-op if it already exists"""
+    try:
+        # The (session_id, patient_id) prefix also serves the queries that don't filter on question_id
+        patient_collection.create_index([("session_id", 1), ("patient_id", 1), ("response.question_id", 1)])
+    except Exception as e:
+        logger.warning(f"Could not create indexes on 'patients': {str(e)}")
+
+# Run once per container, off the cold-start critical path
+io_executor.submit(ensure_indexes)
+
 
 # Initialise SkillBuilder (Manages Alexa skill handlers)
 sb = SkillBuilder()
@@ -40,44 +89,90 @@ sb = SkillBuilder()
 # Error message when data retrieval fails
 retrieve_error_mg = "Sorry, I couldn't retrieve the questions. Please try again later."
 
+# Questions document cache (kept in container memory across warm invocations)
+QUESTIONS_CACHE_TTL = int(os.getenv("QUESTIONS_CACHE_TTL", "3600"))  # Seconds before the document is re-read
+_questions_cache = {"doc": None, "ts": 0.0}
+
+# Spoken email separators ("john dot doe at gmail dot com") and the expected email format
+SPOKEN_EMAIL_PATTERN = re.compile(r"\s+(at|dot)\s+", re.IGNORECASE)
+SPOKEN_EMAIL_SYMBOLS = {"at": "@", "dot": "."}
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.[a-z]{2,}$')
+
+# Already-normalised date of birth (YYYY-MM-DD)
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Non-digit characters in a spoken phone number, and the expected Australian format
+NON_DIGIT_PATTERN = re.compile(r"\D")
+AU_PHONE_PATTERN = re.compile(r'^\+61[23478]\d{8}$')
+
+# Two-digit years ("March '23") and a day between month and year ("March 20 2023")
+SHORT_YEAR_PATTERN = re.compile(r"['’](\d{2})")
+DAY_BEFORE_YEAR_PATTERN = re.compile(r"\b(\w+)\s+\d{1,2}\s+(20\d{2})")
+
+# Start of each word in a name (letters after an apostrophe or hyphen are word starts too, e.g. O'Brien, Mary-Jane)
+NAME_WORD_START_PATTERN = re.compile(r"\b\w")
+
+# Capitalise names; patients often repeat the same name, so results are cached
+@lru_cache(maxsize=256)
+def capitalise_name(name: str) -> str:
+    """Capitalises the first letter of each word in a name (e.g., 'mary-jane smith' -> 'Mary-Jane Smith')"""
+    return NAME_WORD_START_PATTERN.sub(lambda m: m.group(0).upper(), name.lower())
+
+# Question text patterns: "e.g." abbreviations and brackets
+EXAMPLE_ABBREVIATION_PATTERN = re.compile(r"\be\.g[\.:]?\s*", re.IGNORECASE)
+BRACKETS_PATTERN = re.compile(r"[()]")
+
 # Normalise question format
 def normalise_question(text):
     # Replace e.g., e.g: or e.g. with "for example"
-    text = re.sub(r"\be\.g[\.:]?\s*", "for example, ", text, flags=re.IGNORECASE)
+    text = EXAMPLE_ABBREVIATION_PATTERN.sub("for example, ", text)
     # Remove brackets ()
-    text = re.sub(r"[()]", "", text)
+    text = BRACKETS_PATTERN.sub("", text)
     return text.strip()
 
 # Retrieve questions from MongoDB
 def get_questions() -> dict | None:
     """
     Fetches the first document from the 'questions' collection in MongoDB.
+    The document is cached in memory and only re-read once QUESTIONS_CACHE_TTL has elapsed.
 
     Returns:
         dict: The questions document without the MongoDB '_id' field.
         None: If no document is found or an error occurs.
     """
+    cached_doc = _questions_cache["doc"]
+    if cached_doc is not None and time.monotonic() - _questions_cache["ts"] < QUESTIONS_CACHE_TTL:
+        return cached_doc
+
     try:
-        questions_doc = collection.find_one()  # Get the first document
+        # Get the first document, leaving out the MongoDB ObjectId
+        questions_doc = collection.find_one({}, projection={"_id": 0})
         if not questions_doc:
             logger.info("No document found in 'questions' collection.")
             return None
 
-        # Remove MongoDB ObjectId before returning
-        questions_doc.pop("_id", None)
-
         # Normalise question texts
         if "sections" in questions_doc:
             for section in questions_doc["sections"]:
                 for q in section.get("questions", []):
                     q["question"] = normalise_question(q["question"])
 
-        logger.info(f"Retrieved questions: {json.dumps(questions_doc)}")
+        logger.info("Retrieved questions document (%d sections)", len(questions_doc.get("sections", [])))
+        # Only serialise the full document when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Retrieved questions: {json.dumps(questions_doc)}")
+
+        # Store in the container cache for later invocations
+        _questions_cache["doc"] = questions_doc
+        _questions_cache["ts"] = time.monotonic()
         return questions_doc
 
     except Exception as e:
         logger.error(f"Error retrieving questions from MongoDB: {str(e)}")
-        return None
+        return cached_doc  # Serve the stale copy (if any) rather than failing the turn
+
+# Load the questions during container init so the first request finds them in the cache
+get_questions()
 
 # Retrieve the next question based on the current section and question index
 def get_next_question(questions, section_index, question_index):
@@ -93,7 +188,6 @@ def get_next_question(questions, section_index, question_index):
 # Generates auto-incrementing IDs for patients and sessions
 def get_next_sequence(name):
     """Auto-increments the session_id or patient_id in the 'counters' collection"""
-    counters_collection = db["counters"]
     counter = counters_collection.find_one_and_update(
         {"_id": name}, 
         {"$inc": {"seq": 1}}, 
@@ -102,70 +196,163 @@ def get_next_sequence(name):
     )
     return counter["seq"]
 
+# Move the session on to the question after (section_index, question_index)
+def advance_to_next_question(session_attributes, questions, section_index, question_index):
+    """
+    Points the session at the next question, rolling over to the start of the next section when the current one is finished.
+    Returns (next_question, started_new_section); next_question is None once the questionnaire is complete.
+    """
+    next_question = get_next_question(questions, section_index, question_index + 1)
+    if next_question:
+        session_attributes["current_section"] = section_index
+        session_attributes["current_question"] = question_index + 1
+        return next_question, False
+
+    # No more questions in this section → move to next section
+    session_attributes["current_section"] = section_index + 1
+    session_attributes["current_question"] = 0
+    return get_next_question(questions, section_index + 1, 0), True
+
+# Generates the session and patient IDs for a new session
+def get_next_session_ids():
+    """Increments the session_id and patient_id counters concurrently and returns both values"""
+    session_id_future = io_executor.submit(get_next_sequence, "session_id")
+    patient_id = get_next_sequence("patient_id")
+    return session_id_future.result(), patient_id
+
+# Use Alexa's entity resolution when a custom slot value matched one of its listed values
+def resolved_slot_value(slot):
+    """Returns the canonical value Alexa resolved the slot to (e.g. "mum" -> "mother"), or None if it matched none"""
+    resolutions = slot.resolutions.resolutions_per_authority if slot.resolutions else None
+    for resolution in resolutions or []:
+        if resolution.status and resolution.status.code and resolution.status.code.value == "ER_SUCCESS_MATCH" and resolution.values:
+            return resolution.values[0].value.name
+    return None
+
+# Retrieve the patient's answer from the intent slots
+def get_slot_value(intent_request, slot_name):
+    """
+    Returns (value, resolved) for the slot named slot_name, or for the first filled slot if that one is empty.
+    When Alexa matched the answer to one of the slot type's listed values, value is the canonical value and resolved is True.
+    Free-text slots always keep the patient's own words.
+    """
+    slots = intent_request.slots or {}
+    slot = slots.get(slot_name)  # Direct lookup when the interaction model has a slot for this question
+    if not (slot and slot.value):
+        slot = next((s for s in slots.values() if s and s.value), None)
+    if not slot:
+        return None, False
+    canonical_value = resolved_slot_value(slot) if slot_name not in FREE_TEXT_SLOTS else None
+    if canonical_value:
+        return canonical_value, True
+    return slot.value, False
+
+# Work out which slot and question the current turn answers
+def resolve_slot_and_question(session_attributes, current_question_data):
+    """
+    Returns (slot_name, question_text) for the current turn.
+    While a follow-up is being answered (not yet awaiting its confirmation) both come from the pending follow-up,
+    otherwise from the current main question. The slot name defaults to "response".
+    """
+    slot_name = current_question_data.get("question_title", "response")
+    question_text = current_question_data.get("question", "")
+    if session_attributes.get("current_followup_for") and not session_attributes.get("awaiting_followup_confirmation"):
+        unconfirmed = session_attributes.get("unconfirmed_followup", {})
+        if isinstance(unconfirmed, dict):
+            slot_name = unconfirmed.get("question_title", slot_name)
+            question_text = unconfirmed.get("question_text", question_text)
+    return slot_name, question_text
+
 # Retrieve session attributes
 def get_session_attributes(handler_input):
     """Returns the current session attributes"""
     return handler_input.attributes_manager.session_attributes
 
 # Store patient data into MongoDB
-def save_patient_data(session_attributes):
-    """Saves or updates a question-response pair for a given patient session in MongoDB."""
-    # Connect to the MongoDB collection
-    patient_collection = db['patients']  # Connect to the 'patients' collection in MongoDB
+def save_patient_data(session_attributes, question_id=None):
+    """
+    Saves or updates question-response pairs for a given patient session in MongoDB using a single bulk write.
+    When question_id is given only that pair is written (the latest answer); otherwise the whole patient_data snapshot is written.
+    """
     # Get the current time in Melbourne timezone
-    melbourne_time = datetime.now(ZoneInfo("Australia/Melbourne"))
+    melbourne_time = datetime.now(MELBOURNE_TZ)
 
     # Extract session_id and patient_id from session attributes
     session_id = session_attributes.get("session_id")
     patient_id = session_attributes.get("patient_id")
-
-    # Loop through each question-response pair stored in session attributes
-    for question_id, (question_text, answer) in session_attributes.get("patient_data", {}).items():
-        
-        # Define a query to check if the specific question_id already exists in the response array
-        update_query = {
-            "session_id": session_id,
-            "patient_id": patient_id,
-            "response.question_id": question_id  # Search for this specific question_id in the array
+    session_filter = {"session_id": session_id, "patient_id": patient_id}
+
+    patient_data = session_attributes.get("patient_data", {})
+    if question_id is not None:
+        patient_data = {question_id: patient_data[question_id]} if question_id in patient_data else {}
+    if not patient_data:
+        return
+
+    operations = []
+
+    # One upsert per question-response pair being saved
+    for entry_id, (question_text, answer) in patient_data.items():
+        new_entry = {
+            "question_id": entry_id,  # Store question_id (e.g., "q0_0")
+            "question": question_text,  # Store slot_name or the question text
+            "response": answer,  # Store the user's validated answer
+            "time": melbourne_time  # Store the timestamp
         }
 
-        # Define the update operation to modify an existing response
-        update_action = {
-            "$set": {
-                "session_info.session_start": session_attributes.get("session_start"),  # Update session start time
-                "session_info.session_end": melbourne_time,  # Set session end time to current time
-                
-                # Update the existing response where question_id matches
-                "response.$.question": question_text,  # Update the question text if needed
-                "response.$.response": answer,  # Update the stored response
-                "response.$.time": melbourne_time  # Update the response timestamp
-            }
-        }
-
-        # Try to update an existing response in MongoDB
-        result = patient_collection.update_one(update_query, update_action)
-
-        # If no existing response was found, insert a new one
-        if result.matched_count == 0:
-            patient_collection.update_one(
-                {"session_id": session_id, "patient_id": patient_id},  # Find the correct patient session
-                {
-                    "$push": {  # Add a new response entry
-                        "response": {
-                            "question_id": question_id,  # Store question_id (e.g., "q0_0")
-                            "question": question_text,  # Store slot_name or the question text
-                            "response": answer,  # Store the user's validated answer
-                            "time": melbourne_time  # Store the timestamp
-                        }
+        # Pipeline update: replace the matching response entry, or append a new one if the
+        # question_id isn't stored yet. Values are wrapped in $literal so answers starting
+        # with "$" aren't read as field paths.
+        operations.append(UpdateOne(
+            session_filter,
+            [{
+                "$set": {
+                    "session_info.session_start": {"$literal": session_attributes.get("session_start")},  # Update session start time
+                    "session_info.session_end": {"$literal": melbourne_time},  # Set session end time to current time
+                    "response": {
+                        "$cond": [
+                            {"$in": [{"$literal": entry_id}, {"$ifNull": ["$response.question_id", []]}]},
+                            {
+                                "$map": {
+                                    "input": "$response",
+                                    "as": "entry",
+                                    "in": {
+                                        "$cond": [
+                                            {"$eq": ["$$entry.question_id", {"$literal": entry_id}]},
+                                            {"$literal": new_entry},
+                                            "$$entry"
+                                        ]
+                                    }
+                                }
+                            },
+                            {"$concatArrays": [{"$ifNull": ["$response", []]}, [{"$literal": new_entry}]]}
+                        ]
                     }
-                },
-                upsert=True  # Create a new document if it doesn’t exist
-            )
+                }
+            }],
+            upsert=True  # Create a new document if it doesn’t exist
+        ))
+
+    # Send every operation in one round-trip (ordered so repeated upserts hit the same document)
+    patient_collection.bulk_write(operations, ordered=True)
 
     # Log a success message indicating that data has been saved/updated
     logger.info(f"Patient data saved/updated successfully for session {session_id}.")
 
 
+# Make the session's answers durable once the conversation closes
+def save_session_end(session_attributes):
+    """
+    Stamps the session end time with a majority write. The primary replicates its oplog in order,
+    so the majority acknowledgement also covers the earlier w=1 answer saves of the session.
+    """
+    if not session_attributes.get("patient_data"):
+        return
+    patient_collection.with_options(write_concern=DURABLE_WRITE_CONCERN).update_one(
+        {"session_id": session_attributes.get("session_id"), "patient_id": session_attributes.get("patient_id")},
+        {"$set": {"session_info.session_end": datetime.now(MELBOURNE_TZ)}}
+    )
+
+
 # Set up Gemini API Key
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
 if not GENAI_API_KEY:
@@ -174,24 +361,199 @@ if not GENAI_API_KEY:
 # Configure Gemini API with the retrieved API key
 genai.configure(api_key=GENAI_API_KEY)
 
+# Build the Gemini model once per container and reuse it for every call
+GEMINI_MODEL_NAME = "gemini-2.5-flash-preview-04-17"
+gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+# One-word classifications (YES/NO/UNCLEAR) don't need a thinking model; a lite model answers much faster
+CLASSIFIER_MODEL_NAME = "gemini-2.0-flash-lite"
+classifier_model = genai.GenerativeModel(CLASSIFIER_MODEL_NAME)
+
+# Validation and question rewording are latency-sensitive and don't benefit from thinking,
+# so they use plain Flash; its first tokens arrive without a hidden reasoning phase
+FAST_MODEL_NAME = "gemini-2.0-flash"
+fast_model = genai.GenerativeModel(FAST_MODEL_NAME)
+
+# Open the Gemini connection during container init so the first patient turn doesn't pay for DNS/TLS setup
+def warm_gemini_connection():
+    """Makes a free count_tokens call; all models share the default client, so this warms the connection for each of them"""
+    try:
+        fast_model.count_tokens("ready")
+    except Exception as e:
+        logger.warning(f"Could not warm the Gemini connection: {str(e)}")
+
+io_executor.submit(warm_gemini_connection)
+
+# Retry transient Gemini failures (rate limits, timeouts) instead of falling back straight away
+GEMINI_MAX_ATTEMPTS = 3
+GEMINI_RETRY_BASE_DELAY = 0.5  # Seconds; doubled on each retry
+GEMINI_RETRY_BUDGET = 3.0  # Seconds; no retry is started past this, leaving room in Alexa's ~8s response window
+RETRYABLE_GEMINI_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    TimeoutError
+)
+
+def generate_content_with_retry(model, prompt, **kwargs):
+    """
+    Calls model.generate_content, retrying transient errors with exponential backoff and jitter.
+    Gives up early (re-raising the last error) once a retry would end past GEMINI_RETRY_BUDGET seconds.
+    """
+    started = time.monotonic()
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        try:
+            return model.generate_content(prompt, **kwargs)
+        except RETRYABLE_GEMINI_ERRORS as e:
+            delay = GEMINI_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, 0.1)
+            if attempt == GEMINI_MAX_ATTEMPTS - 1 or time.monotonic() - started + delay > GEMINI_RETRY_BUDGET:
+                raise
+            logger.warning(f"Gemini call failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+# Greedy decoding for classification, validation and extraction so identical prompts give identical
+# (and therefore cacheable) answers. No max_output_tokens cap: on 2.5 Flash thinking tokens count towards it.
+DETERMINISTIC_GENERATION_CONFIG = genai.GenerationConfig(temperature=0.0, top_p=1.0)
+
+# Structured output returned by classify_turn
+class TurnClassification(TypedDict):
+    repeat: bool  # Patient explicitly asked for the question to be repeated or explained
+    decision: str  # "YES", "NO" or "UNCLEAR"
+    detail: str  # Extracted detail, or an empty string
+
+# Structured output returned by validate_with_gemini
+class ValidationResult(TypedDict):
+    status: str  # "VALID" or "INVALID"
+    value: str  # Formatted (or extracted) value when VALID
+    question: str  # Reworded question when INVALID
+
+# Fixed part of the validation prompt. Sending it as the system instruction keeps an identical
+# prefix on every validation request so Gemini can reuse it, and only the answer details vary.
+VALIDATION_SYSTEM_INSTRUCTION = """
+You are a smart and meticulous digital assistant supporting a voice-based medical intake system.
+You assist clinicians by checking whether a patient's spoken response matches the expected information type and format.
+
+Task:
+Determine whether the patient's response satisfies the expected intent of the question, using the validation rule provided with it.
+
+Output Format:
+Return a JSON object with these fields:
+- "status": "VALID" if the response clearly answers the question, or "INVALID" if it is vague, unclear, or incorrect
+- "value": if VALID, the response (formatted if needed); otherwise an empty string
+- "question": if INVALID, a reworded question to ask the patient; otherwise an empty string
+
+Constraints:
+- Do not include explanations or multiple options.
+- Format expected values as follows:
+- Dates: YYYY-MM-DD
+- Phone numbers: +61 format
+- Emails: standard email format (e.g. someone@example.com)
+- Addresses: must include street number, street name, suburb and state
+- Names: at least two alphabetic words, capitalised
+- Gender: Accept synonyms of 'male' or 'female' such as woman, man, etc. and convert it to female or male
+- Relationships: Accept common relationships like mother, father, sister, etc.
+
+Only return the JSON object.
+""".strip()
+
+validation_model = genai.GenerativeModel(FAST_MODEL_NAME, system_instruction=VALIDATION_SYSTEM_INSTRUCTION)
+
+# Models and generation configs by name (names keep generate_cached_text's arguments hashable)
+GEMINI_PROFILES = {
+    "classifier": (
+        classifier_model,
+        # The answer is a single word; the cap is safe because this model has no thinking tokens
+        genai.GenerationConfig(temperature=0.0, top_p=1.0, max_output_tokens=5)
+    ),
+    "turn": (
+        gemini_model,
+        genai.GenerationConfig(
+            temperature=0.0,
+            top_p=1.0,
+            response_mime_type="application/json",
+            response_schema=TurnClassification
+        )
+    ),
+    "validation": (
+        validation_model,
+        genai.GenerationConfig(
+            temperature=0.0,
+            top_p=1.0,
+            response_mime_type="application/json",
+            response_schema=ValidationResult
+        )
+    )
+}
+
+# Send a prompt to Gemini and return its text
+def generate_text(prompt: str, profile: Optional[str] = None) -> str:
+    """
+    Sends the prompt to Gemini and returns the stripped response text.
+    profile selects a (model, generation config) pair from GEMINI_PROFILES; by default the shared model is used
+    with DETERMINISTIC_GENERATION_CONFIG.
+    """
+    model, generation_config = GEMINI_PROFILES.get(profile, (gemini_model, DETERMINISTIC_GENERATION_CONFIG))
+    result = generate_content_with_retry(model, prompt, generation_config=generation_config)
+    return result.text.strip() if result.text else ""
+
+# Exact-match cache for Gemini text responses (retried answers resend identical prompts).
+# Not used for validation: those prompts hold patient-specific details that would stay in memory and rarely repeat.
+@lru_cache(maxsize=2048)
+def generate_cached_text(prompt: str, profile: Optional[str] = None) -> str:
+    """Same as generate_text, but results are cached per prompt for the lifetime of the container; errors are not cached."""
+    return generate_text(prompt, profile)
+
+# Stop a streamed Gemini response whose remaining chunks are no longer needed
+def close_stream(response):
+    """Cancels the underlying gRPC stream so the server stops generating; transports without cancel() are drained instead."""
+    cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+    if cancel:
+        cancel()
+    else:
+        response.resolve()
+
+# Stream a generated question and stop as soon as it is complete
+def generate_question_text(prompt: str) -> str:
+    """
+    Streams the Gemini response and stops reading once the first question mark arrives,
+    so any trailing explanation the model adds is never waited for.
+    Returns the text up to and including the first '?', or the whole response if there is none.
+    """
+    response = generate_content_with_retry(fast_model, prompt, stream=True)
+    text = ""
+    try:
+        for chunk in response:
+            # A blocked or empty chunk has no text part, and its .text raises ValueError
+            try:
+                text += chunk.text
+            except ValueError as e:
+                logger.warning(f"Skipping streamed Gemini chunk without text: {e}")
+                continue
+            if "?" in text:
+                break
+    finally:
+        close_stream(response)
+    question_end = text.find("?")
+    return (text[:question_end + 1] if question_end != -1 else text).strip()
+
+# Prompt template for get_gemini_response
+FOLLOW_UP_QUESTION_PROMPT = "Patient was asked: '{question}'\nPatient responded: '{user_answer}'\nWhat is the best follow-up question to ask next? Return only the follow-up question."
+
 def get_gemini_response(user_answer, question):
     """
     Sends user input and the previous question to Gemini for a dynamic follow-up response.
     Returns the AI-generated follow-up question.
     """
     
-    # Define the model to use
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-    
     # Define the prompt for generating a follow-up question
-    prompt = f"Patient was asked: '{question}'\nPatient responded: '{user_answer}'\nWhat is the best follow-up question to ask next? Return only the follow-up question."
+    prompt = FOLLOW_UP_QUESTION_PROMPT.format(question=question, user_answer=user_answer)
 
     try:
-        response = model.generate_content(prompt)
-
         # Extract AI-generated response
-        if hasattr(response, 'text') and response.text:
-            return response.text.strip()
+        follow_up = generate_question_text(prompt)
+        if follow_up:
+            return follow_up
 
         return None  # If no text, return None (fallback to predefined questions)
 
@@ -199,10 +561,52 @@ def get_gemini_response(user_answer, question):
         logger.error(f"Error calling Gemini: {str(e)}")
         return None  # If Gemini API fails, use fallback
 
-# Check if the user response is a YES, NO, or UNCLEAR
-def check_yes_no_with_gemini(user_response: str, question: str) -> str:
-    """Returns YES, NO, or UNCLEAR."""
-    prompt = f"""
+# Words that settle a confirmation on their own, and filler words that may appear around them
+YES_WORDS = frozenset({
+    "yes", "yeah", "yea", "yep", "yup", "sure", "correct", "right", "absolutely", "definitely",
+    "affirmative", "ok", "okay", "exactly", "ready", "true", "indeed", "certainly"
+})
+NO_WORDS = frozenset({"no", "nope", "nah", "not", "wrong", "incorrect", "negative", "never", "isn", "isnt"})
+FILLER_WORDS = frozenset({
+    "i", "it", "is", "its", "that", "thats", "s", "t", "am", "do", "can", "please", "thanks", "thank",
+    "you", "very", "much", "oh", "um", "uh", "well", "so", "the", "one", "all", "m", "really"
+})
+WORD_PATTERN = re.compile(r"[a-z]+")
+RESPONSE_TOKEN_PATTERN = re.compile(r"[\w']+")
+
+# Decide obvious confirmations locally so they don't need a Gemini call
+def match_yes_no_locally(user_response: str) -> Optional[str]:
+    """
+    Returns YES or NO when every word in the response is a yes word (or a no word) or filler,
+    e.g. "yes", "yep that's right", "no", "it's not". Returns None when Gemini should decide.
+    """
+    words = WORD_PATTERN.findall(user_response.lower())
+    if not words:
+        return None
+    has_yes = any(word in YES_WORDS for word in words)
+    has_no = any(word in NO_WORDS for word in words)
+    if has_yes == has_no:
+        return None  # Neither or both (e.g. "yes but not really")
+    allowed_words = (YES_WORDS if has_yes else NO_WORDS) | FILLER_WORDS
+    if all(word in allowed_words for word in words):
+        return "YES" if has_yes else "NO"
+    return None
+
+# Whole replies that can only be a request to hear the question again
+REPEAT_REQUEST_PHRASES = frozenset({
+    "what", "sorry", "sorry what", "pardon", "pardon me", "huh", "excuse me", "come again",
+    "repeat", "repeat that", "repeat please", "please repeat", "can you repeat", "can you repeat that",
+    "could you repeat that", "say that again", "can you say that again", "what was that", "sorry what was that",
+    "i didn't catch that", "i don't understand", "what do you mean"
+})
+
+# Recognise a plain request to hear the question again without calling Gemini
+def match_repeat_locally(user_text: str) -> bool:
+    """Returns True when the whole reply is a repeat request such as "Sorry, what?" or "can you repeat that"."""
+    return " ".join(RESPONSE_TOKEN_PATTERN.findall(user_text.lower())) in REPEAT_REQUEST_PHRASES
+
+# Prompt template for check_yes_no_with_gemini
+YES_NO_CONFIRMATION_PROMPT = """
     You are a **medical voice assistant** helping with patient intake.
 
     **Persona:** 
@@ -240,204 +644,172 @@ def check_yes_no_with_gemini(user_response: str, question: str) -> str:
     - Do not add punctuation or extra text.
     """
 
+# Check if the user response is a YES, NO, or UNCLEAR
+def check_yes_no_with_gemini(user_response: str, question: str) -> str:
+    """Returns YES, NO, or UNCLEAR. Obvious replies are decided locally without calling Gemini."""
+    local_decision = match_yes_no_locally(user_response)
+    if local_decision:
+        logger.info(f"[Local Confirmation] Detected response: {local_decision}")
+        return local_decision
+
+    # Normalise case and punctuation so common replies ("Yes.", "yes ", "yes!") share one cached prompt
+    user_response = " ".join(RESPONSE_TOKEN_PATTERN.findall(user_response.lower()))
+    prompt = YES_NO_CONFIRMATION_PROMPT.format(question=question, user_response=user_response)
+
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        decision = result.text.strip().upper()
+        decision = generate_cached_text(prompt, "classifier").upper() or "UNCLEAR"
         logger.info(f"[Gemini Confirmation] Detected response: {decision}")
         return decision
     except Exception as e:
         logger.error(f"[Gemini Confirmation] Error calling Gemini: {str(e)}")
         return "UNCLEAR"
 
-def parse_yes_no_and_detail(user_response: str, main_question: str, topic: Optional[str] = None) -> tuple[str, Optional[str]]:
-    """
-    Analyses the patient's response using Gemini to:
-    1. Determine if it implies YES, NO, or UNCLEAR to the main Yes/No question.
-    2. Extract follow-up detail if the answer is YES and contains specifics.
-    
-    Returns:
-        Tuple[str, Optional[str]]:
-            - One of "YES", "NO", "UNCLEAR"
-            - Extracted detail (e.g., "asthma and high blood pressure") or None
-    """
-    prompt = f"""
+# Prompt template for classify_turn
+CLASSIFY_TURN_PROMPT = """
     You are a reliable and medically informed assistant designed to interpret patient responses during health intake.
 
     **Main Question:** "{main_question}"
     **Patient Response:** "{user_response}"
 
     Your tasks are:
-    1. Determine if the patient is affirming ("YES"), denying ("NO"), or unclear ("UNCLEAR") in response to the main question.
-    2. If the answer is "YES", and the patient provides additional detail, extract that detail clearly, concisely and medically — even if it's embedded in casual language.
+    1. Set "repeat" to true only if the patient explicitly asks for the question to be repeated or explained (e.g. "sorry, what?", "can you repeat that", "what do you mean"). Being unsure ("not sure", "I don't know") is an answer, not a repeat request — set "repeat" to false.
+    2. Determine if the patient is affirming ("YES"), denying ("NO"), or unclear ("UNCLEAR") in response to the main question.
+    3. If the answer is "YES", and the patient provides additional detail, extract that detail clearly, concisely and medically — even if it's embedded in casual language.
 
     Examples:
-    - "yeah I have asthma and high blood pressure" → YES|asthma and high blood pressure
-    - "yes I had my appendix removed" → YES|appendectomy
-    - "I had hip replacement and some dental work" → YES|hip replacement
-    - "nope" → NO|
-    - "not sure" → UNCLEAR|
+    - "yeah I have asthma and high blood pressure" → {{"repeat": false, "decision": "YES", "detail": "asthma and high blood pressure"}}
+    - "yes I had my appendix removed" → {{"repeat": false, "decision": "YES", "detail": "appendectomy"}}
+    - "I had hip replacement and some dental work" → {{"repeat": false, "decision": "YES", "detail": "hip replacement"}}
+    - "nope" → {{"repeat": false, "decision": "NO", "detail": ""}}
+    - "not sure" → {{"repeat": false, "decision": "UNCLEAR", "detail": ""}}
+    - "I don't know" → {{"repeat": false, "decision": "UNCLEAR", "detail": ""}}
+    - "sorry, what was that?" → {{"repeat": true, "decision": "UNCLEAR", "detail": ""}}
 
     Rules:
-    - Return the result in one line only: DECISION|DETAIL
-    - If there is no detail to extract, leave the detail section blank. E.g., "YES|", "NO|", or "UNCLEAR|"
+    - Return a JSON object with the fields "repeat", "decision" and "detail".
+    - If there is no detail to extract, use an empty string for "detail".
     - If the detail implies a known medical procedure, summarise it in a medically accurate form (e.g., "had appendix out" → "appendectomy").
-    - Do NOT include any explanation, punctuation outside the format, or markdown
-    - Do NOT include line breaks, bullet points, or elaboration — only the result
-
-    Format:
-    DECISION|[EXTRACTED_DETAIL]
+    - Do NOT include any explanation or markdown — only the JSON object.
     """.strip()
 
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        response_text = result.text.strip()
-
-        logger.info(f"[Gemini parse_yes_no_and_detail] {response_text}")
-
-        if "|" in response_text:
-            decision, detail = response_text.split("|", 1)
-            return decision.strip().upper(), detail.strip() or None
-        return "UNCLEAR", None
-    except Exception as e:
-        logger.error(f"parse_yes_no_and_detail failed: {e}")
-        return "UNCLEAR", None
-
-
-# Rephrase the question using Gemini AI
-def is_repeat_request(user_text: str, original_question: str) -> bool:
-    prompt = f"""
-    You are an attentive and patient digital assistant working in a medical clinic. 
-    Your role is to detect when a patient is confused or didn't understand a question during a voice-based medical interview.
-    Patients are asked clear, structured questions, and their responses are recorded as natural spoken text. 
-    Your job is to assess whether the response indicates understanding or confusion.
-
-    The patient was asked: "{original_question}"
-    The patient responded: "{user_text}"
-
-    Determine if the patient:
-    - Understood the question and responded appropriately (return NO)
-    - Misunderstood, was unsure, or asked for clarification (return YES)
-
-    Return exactly one of the following values:
-    - YES — if the patient showed signs of confusion, hesitation, or unrelated responses
-    - NO — if the patient clearly answered the question
-
-    Only return YES or NO.
-    Do not provide explanations or summaries.
+def classify_turn(user_response: str, main_question: str) -> tuple[bool, str, Optional[str]]:
+    """
+    Analyses the patient's response to a main Yes/No question in a single Gemini call to:
+    1. Detect whether the patient explicitly asked for the question to be repeated or explained.
+    2. Determine if it implies YES, NO, or UNCLEAR to the main Yes/No question.
+    3. Extract follow-up detail if the answer is YES and contains specifics.
 
-    Examples of confusion:
-    - The patient says things like "sorry", "what", "not sure", "I don't know", or "can you repeat".
-    - The answer is off-topic or unrelated.
-    - The response is too vague to be useful.
+    Returns:
+        Tuple[bool, str, Optional[str]]:
+            - True if the patient explicitly asked for a repeat or an explanation
+            - One of "YES", "NO", "UNCLEAR"
+            - Extracted detail (e.g., "asthma and high blood pressure") or None
+    """
+    # A plain repeat request or a bare yes/no ("yes", "nope", "no it's not") carries no detail, so it doesn't need Gemini
+    if match_repeat_locally(user_response):
+        logger.info("[Local classify_turn] Detected repeat request")
+        return True, "UNCLEAR", None
+    local_decision = match_yes_no_locally(user_response)
+    if local_decision:
+        logger.info(f"[Local classify_turn] Detected response: {local_decision}")
+        return False, local_decision, None
 
-    Examples of understanding:
-    - The patient provides a relevant answer to the question, even if it's informal or not perfectly formatted.
-    - For name questions, responses like "John Smith", "My name is Sarah Lee", or "I'm Tom" are valid.
+    prompt = CLASSIFY_TURN_PROMPT.format(main_question=main_question, user_response=user_response)
 
-    Output format: 
-    Just one word, either YES or NO.
-    Do not include any explanation.
-    """
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        decision = result.text.strip().lower()
-        logger.info(f"Gemini repeat check result: {decision}")
-        return decision.startswith("yes")
-    except Exception as e:
-        logger.warning(f"Gemini repeat detection failed: {e}")
-        return False
+        response_text = generate_cached_text(prompt, "turn")
 
+        logger.info(f"[Gemini classify_turn] {response_text}")
 
-# Validate user input using Gemini AI
-def validate_with_gemini(slot_name: str, slot_value: str, original_question: str) -> tuple[bool, str]:
-    """
-    Uses Gemini to validate structured and unstructured patient responses.
-    Returns:
-      - (True, value) if valid
-      - (False, reworded_question) if invalid or unclear
+        classification = json.loads(response_text)
+        decision = str(classification.get("decision", "UNCLEAR")).strip().upper()
+        detail = str(classification.get("detail") or "").strip() or None
+        return bool(classification.get("repeat")), decision, detail
+    except Exception as e:
+        logger.error(f"classify_turn failed: {e}")
+        return False, "UNCLEAR", None
+
+
+# Structured validation rules used by validate_with_gemini
+NAME_RULE = "Ensure the response contains at least two alphabetic words representing a typical full name (e.g., 'John Smith')."
+PHONE_RULE = "Convert spoken input to digits. Accept valid Australian numbers with +61 prefix if starting with 0."
+DATE_RULE = "Accept full or partial dates. If the patient says 'March twenty twenty three' or Alexa transcribes it as 'March 20 '23', treat this as 'March 2023' unless a specific day is clearly mentioned."
+
+VALIDATION_RULES = {
+    "name": NAME_RULE,
+    "emergency_contact": NAME_RULE,
+    "date_of_birth": "Convert spoken input into YYYY-MM-DD format. Accept 'eleven november nineteen ninety' as 1990-11-11. Must be a past date.",
+    "email": "Ensure it is a valid email. Accept spoken versions like 'john dot doe at gmail dot com'.",
+    "gender": "Accept only 'male' or 'female' or common synonyms like 'man', 'woman'.",
+    "contact_number": PHONE_RULE,
+    "emergency_contact_phone": PHONE_RULE,
+    "home_address": "Must include street number, street name, suburb, state. Post code is optional. Convert spoken numbers/phrases into standard address format.",
+    "emergency_contact_relationship": "Accept typical relationships (e.g., mother, father, partner, friend, spouse).",
+    "surgeries_date": DATE_RULE,
+    "immunizations_date": DATE_RULE
+}
+
+# Rule used for slots without a specific entry in VALIDATION_RULES
+FALLBACK_VALIDATION_RULE = """
+    Ensure the patient's response clearly answers the question: '{original_question}'.
+    - It should be complete and relevant.
+    - If unclear or incomplete, request clarification.
     """
 
-    def generate_prompt(slot_name: str, slot_value: str, original_question: str, validation_rule: str) -> str:
-        return f"""
-        You are a smart and meticulous digital assistant supporting a voice-based medical intake system.
-        You assist clinicians by checking whether a patient's spoken response matches the expected information type and format.
-
+# Per-answer part of the validation prompt (sent to validation_model)
+VALIDATION_PROMPT = """
         The patient was asked: "{original_question}"
         Patient Response: "{slot_value}"
         Slot type: "{slot_name}"
 
         Validation Rule:
         {validation_rule}
-
-        Task:
-        Determine whether the patient's response satisfies the expected intent of the question.
-
-        Output Format:
-        - VALID — if the response clearly answers the question
-        - VALID|[Formatted Value] — if the response is valid but needs formatting
-        - INVALID|[Reworded Question] — if the response is vague, unclear, or incorrect
-
-        Constraints:
-        - Do not include explanations or multiple options.
-        - Format expected values as follows:
-        - Dates: YYYY-MM-DD
-        - Phone numbers: +61 format
-        - Emails: standard email format (e.g. someone@example.com)
-        - Addresses: must include street number, street name, suburb and state
-        - Names: at least two alphabetic words, capitalised
-        - Gender: Accept synonyms of 'male' or 'female' such as woman, man, etc. and convert it to female or male
-        - Relationships: Accept common relationships like mother, father, sister, etc.
-
-        Only return one of: VALID, VALID|[Formatted Value], or INVALID|[Reworded Question]
+        {extraction_instruction}
                 """.strip()
 
-    # Structured validation rules
-    name_rule = "Ensure the response contains at least two alphabetic words representing a typical full name (e.g., 'John Smith')."
-    phone_rule = "Convert spoken input to digits. Accept valid Australian numbers with +61 prefix if starting with 0."
-    date_rule = "Accept full or partial dates. If the patient says 'March twenty twenty three' or Alexa transcribes it as 'March 20 '23', treat this as 'March 2023' unless a specific day is clearly mentioned."
-
-    validation_rules = {
-        "name": name_rule,
-        "emergency_contact": name_rule,
-        "date_of_birth": "Convert spoken input into YYYY-MM-DD format. Accept 'eleven november nineteen ninety' as 1990-11-11. Must be a past date.",
-        "email": "Ensure it is a valid email. Accept spoken versions like 'john dot doe at gmail dot com'.",
-        "gender": "Accept only 'male' or 'female' or common synonyms like 'man', 'woman'.",
-        "contact_number": phone_rule,
-        "emergency_contact": name_rule,
-        "emergency_contact_phone": phone_rule,
-        "home_address": "Must include street number, street name, suburb, state. Post code is optional. Convert spoken numbers/phrases into standard address format.",
-        "emergency_contact_relationship": "Accept typical relationships (e.g., mother, father, partner, friend, spouse).",
-        "surgeries_date": date_rule,
-        "immunizations_date": date_rule
-    }
+# Added to VALIDATION_PROMPT when the details should be extracted in the same call
+EXTRACTION_INSTRUCTION = """
+        Extraction:
+        If the response is valid, set "value" to the key medical details in a concise format (e.g., "hypertension, diabetes").
+        If nothing can be extracted, use the original response as the value.
+        """
 
-    # Use specific or fallback rule
-    rule = validation_rules.get(slot_name, f"""
-    Ensure the patient's response clearly answers the question: '{original_question}'.
-    - It should be complete and relevant.
-    - If unclear or incomplete, request clarification.
-    """)
+# Validate user input using Gemini AI
+def validate_with_gemini(slot_name: str, slot_value: str, original_question: str, extract_details: bool = False) -> tuple[bool, str]:
+    """
+    Uses Gemini to validate structured and unstructured patient responses.
+    When extract_details is True, the same call also extracts the key medical details,
+    which saves a separate extract_information_with_gemini round-trip.
+    Returns:
+      - (True, value) if valid
+      - (False, reworded_question) if invalid or unclear
+    """
 
-    prompt = generate_prompt(slot_name, slot_value, original_question, rule)
+    # Use specific or fallback rule
+    rule = VALIDATION_RULES.get(slot_name) or FALLBACK_VALIDATION_RULE.format(original_question=original_question)
+
+    # The fixed instructions live in VALIDATION_SYSTEM_INSTRUCTION; only the per-answer details are sent here
+    prompt = VALIDATION_PROMPT.format(
+        original_question=original_question,
+        slot_value=slot_value,
+        slot_name=slot_name,
+        validation_rule=rule,
+        extraction_instruction=EXTRACTION_INSTRUCTION if extract_details else ""
+    )
 
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        response_text = result.text.strip()
+        response_text = generate_text(prompt, "validation")
 
         logger.info(f"Gemini validation response: {response_text}")
 
-        if response_text.startswith("VALID|"):
-            return True, response_text.split("|", 1)[1].strip("[]")
+        validation = json.loads(response_text)
+        status = str(validation.get("status", "")).upper()
 
-        elif response_text.startswith("INVALID|"):
-            return False, response_text.split("|", 1)[1].strip("[]")
+        if status == "VALID":
+            return True, validation.get("value") or slot_value
 
-        elif response_text == "VALID":
-            return True, slot_value
+        elif status == "INVALID":
+            return False, validation.get("question") or original_question
 
         return True, slot_value  # Fallback if unexpected
 
@@ -446,22 +818,17 @@ def validate_with_gemini(slot_name: str, slot_value: str, original_question: str
         return True, slot_value  # Fallback if Gemini fails
 
 
-# Extract structured information from free-text responses using Gemini AI
-def extract_information_with_gemini(question: str, user_response: str, slot_name: Optional[str] = None) -> str:
-    """
-    Uses Gemini AI to extract structured details from free-text answers.
-    Customises prompts based on slot_name when available.
-    """
-    if slot_name == "emergency_contact_relationship":
-        prompt = f"""
+# Prompt template for extract_information_with_gemini (emergency contact relationship)
+RELATIONSHIP_EXTRACTION_PROMPT = """
         The patient was asked to provide the relationship of their emergency contact.
         They responded: "{user_response}"
 
         Extract only the relationship term such as "father", "sister", "partner", etc. 
         Return just the single word, with no extra explanation.
         """
-    else:
-        prompt = f"""
+
+# Prompt template for extract_information_with_gemini
+DETAIL_EXTRACTION_PROMPT = """
         The patient was asked: "{question}"
         The patient responded: "{user_response}"
 
@@ -469,18 +836,34 @@ def extract_information_with_gemini(question: str, user_response: str, slot_name
         If nothing can be extracted, return the original response.
         """
 
+# Extract structured information from free-text responses using Gemini AI
+def extract_information_with_gemini(question: str, user_response: str, slot_name: Optional[str] = None) -> str:
+    """
+    Uses Gemini AI to extract structured details from free-text answers.
+    Customises prompts based on slot_name when available.
+    Single-word answers (e.g. "asthma", "sister", "12") are already as concise as they can be and are returned unchanged.
+    """
+    user_response = user_response.strip()
+    if len(user_response.split()) <= 1:
+        return user_response
+
+    if slot_name == "emergency_contact_relationship":
+        prompt = RELATIONSHIP_EXTRACTION_PROMPT.format(user_response=user_response)
+    else:
+        prompt = DETAIL_EXTRACTION_PROMPT.format(question=question, user_response=user_response)
+
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        return result.text.strip() if result.text else user_response
+        return generate_cached_text(prompt) or user_response
     except Exception as e:
         logger.error(f"Error extracting structured response with Gemini: {str(e)}")
         return user_response
 
     
-# Rephrase the question using Gemini
-def get_rephrased_question(original_question: str) -> str:
-    prompt = f"""
+# Leading markdown/list markers ("**", "-", "1.") on a Gemini line
+LIST_MARKER_PATTERN = re.compile(r"^[\*\-\d\.]+")
+
+# Prompt template for get_rephrased_question
+REPHRASE_PROMPT = """
     The following is a question we ask patients during a medical interview: "{original_question}"
 
     Rephrase this question to be simpler and easier to understand for the average patient.
@@ -492,53 +875,81 @@ def get_rephrased_question(original_question: str) -> str:
     - Return the rephrased question as a single plain sentence.
     """
 
+# Rephrased questions by original text (the questions are static, so each only needs rephrasing once per container)
+_rephrased_questions = {}
+
+# Rephrase the question using Gemini
+def get_rephrased_question(original_question: str) -> str:
+    cached = _rephrased_questions.get(original_question)
+    if cached:
+        return cached
+
+    prompt = REPHRASE_PROMPT.format(original_question=original_question)
+
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
-        full_text = result.text.strip() if result.text else None
+        full_text = generate_question_text(prompt)
 
         if not full_text:
             return None
 
+        rephrased = full_text  # Otherwise, just return the full response
         # If Gemini returned a list, extract the first item
         for line in full_text.splitlines():
             line = line.strip()
             if line.startswith("**") or line.startswith("1.") or line.startswith("-"):
-                return re.sub(r"^[\*\-\d\.]+", "", line).strip(' "')
+                rephrased = LIST_MARKER_PATTERN.sub("", line).strip(' "')
+                break
 
-        # Otherwise, just return the full response
-        return full_text
+        _rephrased_questions[original_question] = rephrased
+        return rephrased
 
     except Exception as e:
         logger.warning(f"Gemini failed to rephrase question: {e}")
         return None
 
-# Determine which follow-up questions can be skipped based on the patient's response
-def get_skipped_followups(main_question: str, patient_response: str, follow_ups: list) -> list:
-    """
-    Use Gemini to determine which follow-up questions are already answered in the initial response.
-    Returns a list of indexes (0-based) of follow-ups to skip.
-    """
-    prompt = f"""
+# Question numbers in Gemini's follow-up skip list
+NUMBER_PATTERN = re.compile(r"\d+")
+
+# Prompt template for get_skipped_followups
+SKIPPED_FOLLOWUPS_PROMPT = """
     The patient was asked: "{main_question}"
     They replied: "{patient_response}"
 
     These are the planned follow-up questions:
-    {chr(10).join([f"{i+1}. {q['question']}" for i, q in enumerate(follow_ups)])}
+    {numbered_follow_ups}
 
     Based on their reply, which follow-up questions are already answered?
 
     Return only the question numbers to skip, as a comma-separated list (e.g., 1,3). If none, return "none".
     """
 
+# Determine which follow-up questions can be skipped based on the patient's response
+def get_skipped_followups(main_question: str, patient_response: str, follow_ups: list) -> list:
+    """
+    Use Gemini to determine which follow-up questions are already answered in the initial response.
+    Returns a list of indexes (0-based) of follow-ups to skip.
+    """
+    # A bare "yes" answers none of the follow-ups and a bare "no" rules them all out, so there is nothing to ask Gemini
+    local_decision = match_yes_no_locally(patient_response)
+    if local_decision == "YES":
+        return []
+    if local_decision == "NO":
+        return list(range(len(follow_ups)))
+
+    numbered_follow_ups = "\n".join(f"{i+1}. {q['question']}" for i, q in enumerate(follow_ups))
+    prompt = SKIPPED_FOLLOWUPS_PROMPT.format(
+        main_question=main_question,
+        patient_response=patient_response,
+        numbered_follow_ups=numbered_follow_ups
+    )
+
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-        result = model.generate_content(prompt)
+        result = generate_content_with_retry(gemini_model, prompt, generation_config=DETERMINISTIC_GENERATION_CONFIG)
         text = result.text.strip().lower()
         if "none" in text:
             return []
-        # Convert string like "1,3" to [0,2]
-        return [int(i.strip()) - 1 for i in text.split(",") if i.strip().isdigit()]
+        # Convert string like "1,3" (or noisier output like "skip: 1, 3.") to [0,2]
+        return [int(number) - 1 for number in NUMBER_PATTERN.findall(text)]
     except Exception as e:
         logger.warning(f"[Gemini] Failed to analyse follow-up skipping: {e}")
         return []
@@ -548,15 +959,81 @@ def get_skipped_followups(main_question: str, patient_response: str, follow_ups:
 def add_short_pause(text, pause_duration_ms=1000):
     return f"<break time='{pause_duration_ms}ms'/> {text}"
 
+# Opening question variants used when the readiness reply is unclear
+OPENING_REPHRASES = (
+    "We’d like to ask you some simple questions to get to know your health background. Your answers are kept confidential and help our team look after you better. Shall we get started?",
+    "To get to know you better and support your care, we’ll ask a few health questions. Your answers stay private. Ready to begin?",
+    "Let's go through some simple health questions. Your information is kept secret and helps us provide the best care. Are you ready to start?"
+)
+
+# Spoken after a confirmed follow-up answer is saved (pause already applied; fill in patient_first_name)
+FOLLOWUP_SAVED_TEMPLATES = tuple(add_short_pause(template, pause_duration_ms=800) for template in (
+    "Thanks {patient_first_name}! I've saved that information.",
+    "Got it! Your information has been recorded.",
+    "Thanks {patient_first_name}! Your response has been saved successfully.",
+    "Okay, {patient_first_name}. I've noted that.",
+    "Great! Your information is now stored.",
+    "Understood! Your details have been saved.",
+    "Your answer has been updated. Thank you {patient_first_name}!"
+))
+
+# Spoken after a confirmed main answer is saved (pause already applied; fill in patient_first_name and slot_name)
+ANSWER_SAVED_TEMPLATES = tuple(add_short_pause(template, pause_duration_ms=800) for template in (
+    "Thanks {patient_first_name}! I've saved your {slot_name}.",
+    "Got it! Your {slot_name} has been recorded.",
+    "Thanks {patient_first_name}! Your {slot_name} has been saved successfully.",
+    "Okay, {patient_first_name}. I've noted your {slot_name}.",
+    "Great! Your {slot_name} is now stored.",
+    "Understood! Your {slot_name} has been saved.",
+    "Your {slot_name} has been updated. Thank you {patient_first_name}!"
+))
+
+# Acknowledgements spoken before the next question when a Yes/No question is answered NO
+NO_ANSWER_ACKNOWLEDGEMENTS = (
+    "Thanks for letting me know. Next: ",
+    "Alright, noted.  Next: ",
+    "Got it. Next question: ",
+    "Understood.  Next question: ",
+    "No worries, that's helpful to know. Next: ",
+    "Okay, Next: ",
+)
+
+# Confirmation prompts for structured answers (pause already applied; fill in slot_name and slot_value)
+STRUCTURED_CONFIRMATIONS = tuple(add_short_pause(template, pause_duration_ms=800) for template in (
+    "Got it. Just to confirm, is your {slot_name} {slot_value}?",
+    "Thanks. Just checking: is your {slot_name} {slot_value}?",
+    "Understood. Can you confirm that your {slot_name} is {slot_value}?",
+    "Thanks. Just to make sure I got it right, is your {slot_name} {slot_value}?",
+    "Okay, your {slot_name} is {slot_value}. Is that correct?",
+    "Thank you. Did I get your {slot_name} right? Is it {slot_value}?"
+))
+
+# Confirmation prompts for free text answers (pause already applied; fill in slot_value)
+FREE_TEXT_CONFIRMATIONS = tuple(add_short_pause(template, pause_duration_ms=800) for template in (
+    "Thanks for sharing. You mentioned: {slot_value}. Is that correct?",
+    "You said: {slot_value}. Can I confirm that?",
+    "Okay, I heard: {slot_value}. Is that correct?",
+    "Just to make sure I got it right, you said: {slot_value}, correct?",
+    "You shared: {slot_value}. Did I hear it right?",
+    "Got it. You mentioned: {slot_value}. Is that correct?",
+    "Thanks. Did I understand correctly: {slot_value}?"
+))
+
 
 # Converts "2023-03" into "March 2023" for natural Alexa speech
+# Year-month values returned by date validation, and their spoken month names
+YEAR_MONTH_PATTERN = re.compile(r"(\d{4})-(\d{1,2})")
+MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
 def format_date_for_speech(ym: str) -> str:
     """Convert '2023-03' to 'March 2023' for natural speech."""
-    try:
-        dt = datetime.strptime(ym, "%Y-%m")
-        return dt.strftime("%B %Y")  # e.g., "March 2023"
-    except Exception:
-        return ym  # fallback to raw if parsing fails
+    match = YEAR_MONTH_PATTERN.fullmatch(ym)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return f"{MONTH_NAMES[int(match.group(2)) - 1]} {match.group(1)}"  # e.g., "March 2023"
+    return ym  # fallback to raw if parsing fails
 
 
 # Handles session end
@@ -579,6 +1056,16 @@ def json_serial(obj):
     raise TypeError(f"Type {type(obj)} not serializable")
 
 
+# A response without a reprompt ends the conversation, so wait for the answers to replicate
+@sb.global_response_interceptor()
+def save_session_end_interceptor(handler_input: HandlerInput, response: Response):
+    if response is None or response.reprompt is None:
+        try:
+            save_session_end(handler_input.attributes_manager.session_attributes)
+        except Exception as e:
+            logger.error(f"Error saving session end: {str(e)}")
+
+
 # LaunchRequest handler
 @sb.request_handler(can_handle_func=lambda handler_input:
                     isinstance(handler_input.request_envelope.request, LaunchRequest))
@@ -588,15 +1075,17 @@ def launch_request_handler(handler_input: HandlerInput) -> Response:
     session_attributes = get_session_attributes(handler_input)
     
     # Get the current time in Melbourne timezone
-    melbourne_time = datetime.now(ZoneInfo("Australia/Melbourne"))
+    melbourne_time = datetime.now(MELBOURNE_TZ)
 
     if questions:
+        session_id, patient_id = get_next_session_ids()
         session_attributes.update({
+            'patient_data': {},
             'current_section': 0,
             'current_question': 0,
             'session_start': melbourne_time,
-            'session_id': get_next_sequence("session_id"),
-            'patient_id': get_next_sequence("patient_id")
+            'session_id': session_id,
+            'patient_id': patient_id
         })
         speak_output = questions['opening']
         session_attributes['waiting_for_ready_confirmation'] = True
@@ -607,6 +1096,32 @@ def launch_request_handler(handler_input: HandlerInput) -> Response:
     return handler_input.response_builder.speak(speak_output).ask(speak_output).response
 
 
+# Free text slots
+FREE_TEXT_SLOTS = frozenset({
+    "medical_conditions_list",
+    "surgeries_list",
+    "surgeries_reason",
+    "medications_list",
+    "allergy_type",
+    "allergy_reaction",
+    "family_medical_conditions_list",
+    "family_medical_conditions_list_2",
+    "family_disability_type",
+    "family_disability_type_2",
+    "exercise_list",
+    "immunizations_list",
+    "occupation",
+    "travel_frequency",
+    "harsh_environment_exposure"
+})
+
+# Slots that do NOT need confirmation (e.g., Yes/No or system-handled data)
+NO_CONFIRMATION_SLOTS = frozenset({
+    "medical_conditions", "surgeries", "allergies", "children",
+    "smoking_status", "alcohol_consumption", "exercise", "family_medical_history", "family_disabilities",
+    "immunizations", "previous_medical_records", "previous_medical_records_submission"
+})
+
 # Registers this function as the handler for CaptureAnswerIntent
 @sb.request_handler(can_handle_func=lambda handler_input:
     isinstance(handler_input.request_envelope.request, IntentRequest) and
@@ -617,51 +1132,23 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     logger.info("CaptureAnswerIntent matched successfully.")    # Logs that CaptureAnswerIntent has been successfully triggered
     session_attributes = handler_input.attributes_manager.session_attributes    # Fetches session attributes (memory between turns)
 
-    # List of free text slots
-    FREE_TEXT_SLOTS = [
-        "medical_conditions_list",
-        "surgeries_list",
-        "surgeries_reason",
-        "medications_list",
-        "allergy_type",
-        "allergy_reaction",
-        "family_medical_conditions_list",
-        "family_medical_conditions_list_2",
-        "family_disability_type",
-        "family_disability_type_2",
-        "exercise_list",
-        "immunizations_list",
-        "occupation",
-        "travel_frequency",
-        "harsh_environment_exposure"
-    ]
-
-    # List of slots that do NOT need confirmation (e.g., Yes/No or system-handled data)
-    NO_CONFIRMATION_SLOTS = [
-       "medical_conditions", "surgeries", "allergies", "children",
-        "smoking_status", "alcohol_consumption", "exercise", "family_medical_history", "family_disabilities",
-        "immunizations", "previous_medical_records", "previous_medical_records_submission"
-    ]
-
-    # Try to get saved questions
-    questions = session_attributes.get('questions')
-    # If missing, load questions from database or backend via get_questions()
+    # Load the questions (served from the container cache; they are not kept in the session)
+    questions = get_questions()
+    # If no questions (e.g., error retrieving), return an error message asking the user to try again.
     if not questions:
-        questions = get_questions()
-        # If still no questions (e.g., error retrieving), return an error message asking the user to try again.
-        if not questions:
-            return handler_input.response_builder.speak(retrieve_error_mg).ask(retrieve_error_mg).response
-        
-        # If questions are loaded successfully, get the current time in Melbourne timezone
-        melbourne_time = datetime.now(ZoneInfo("Australia/Melbourne"))
-        # If loading questions succeeded, set up session tracking: section, question, and session start time.
+        return handler_input.response_builder.speak(retrieve_error_mg).ask(retrieve_error_mg).response
+
+    # If the session didn't start with a LaunchRequest, set up session tracking: section, question, and session start time.
+    if "session_id" not in session_attributes:
+        # Get the current time in Melbourne timezone
+        melbourne_time = datetime.now(MELBOURNE_TZ)
+        session_id, patient_id = get_next_session_ids()
         session_attributes.update({
-            'questions': questions,
             'current_section': 0,
             'current_question': 0,
             'session_start': melbourne_time,
-            'session_id': get_next_sequence("session_id"),
-            'patient_id': get_next_sequence("patient_id"),
+            'session_id': session_id,
+            'patient_id': patient_id,
             'patient_data': {}
         })
     # Load the current section number and question number from session
@@ -669,18 +1156,6 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     current_question = session_attributes.get('current_question', 0)
     # Fetch the actual current question data using a helper get_next_question()
     current_question_data = get_next_question(questions, current_section, current_question)
-    # Override slot_name and question_text if we're in a follow-up
-    if session_attributes.get("current_followup_for") and not session_attributes.get("awaiting_followup_confirmation"):
-        unconfirmed = session_attributes.get("unconfirmed_followup", {})
-        if isinstance(unconfirmed, dict) and all(k in unconfirmed for k in ["question_title", "question_text"]):
-            slot_name = unconfirmed["question_title"]
-            question_text = unconfirmed["question_text"]
-        else:
-            slot_name = current_question_data.get("question_title", "response")
-            question_text = current_question_data.get("question", "")
-    else:
-        slot_name = current_question_data.get("question_title", "response")
-        question_text = current_question_data.get("question", "")
 
     # If no question is found, it means survey is over — say thank you and finish
     if not current_question_data:
@@ -688,27 +1163,15 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
 
     # Get the intent object
     intent_request = handler_input.request_envelope.request.intent
-    # Figure out what slot to check (question_title) or default to "response."
-    slot_name = current_question_data.get("question_title", "response")
-    # Ensure slot_name/question_text comes from follow-up if in follow-up phase
-    if session_attributes.get("current_followup_for") and not session_attributes.get("awaiting_followup_confirmation"):
-        unconfirmed = session_attributes.get("unconfirmed_followup", {})
-        if isinstance(unconfirmed, dict):
-            slot_name = unconfirmed.get("question_title", slot_name)
-            question_text = unconfirmed.get("question_text", question_text)
+    # Figure out what slot to check and which question it answers (the follow-up's, if in follow-up phase)
+    slot_name, question_text = resolve_slot_and_question(session_attributes, current_question_data)
     # Try to extract a non-empty slot value from the request
-    slot_value = next((s.value for s in intent_request.slots.values() if s and s.value), None)
-
-    # If no slot value is found directly, double-check all slots just in case
-    if not slot_value:
-        for key, alt_slot in intent_request.slots.items():
-            if alt_slot and alt_slot.value:
-                slot_value = alt_slot.value
-                break
+    slot_value, slot_resolved = get_slot_value(intent_request, slot_name)
 
     # If still nothing, ask the user to repeat            
     if not slot_value:
-        return handler_input.response_builder.speak(f"Sorry, could you please repeat your {slot_name.replace('_', ' ')}?").ask(f"Can you repeat your {slot_name.replace('_', ' ')}?").response
+        spoken_slot_name = slot_name.replace('_', ' ')
+        return handler_input.response_builder.speak(f"Sorry, could you please repeat your {spoken_slot_name}?").ask(f"Can you repeat your {spoken_slot_name}?").response
 
     # Log the slot name and value for debugging
     logger.info(f"[DEBUG] Slot name: {slot_name}")
@@ -717,10 +1180,6 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     # Readiness Confirmation Phase
     if session_attributes.get("waiting_for_ready_confirmation"):
 
-        if "opening" not in questions:
-            questions = get_questions()
-            session_attributes["questions"] = questions
-
         # Use Gemini AI to interpret YES/NO/UNCLEAR from user's speech based on opening question
         decision = check_yes_no_with_gemini(slot_value, questions["opening"])
         # If YES -> Mark ready, reset counters, move to the first question
@@ -736,11 +1195,6 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             return handler_input.response_builder.speak("That's okay. Let me know when you're ready.").ask("Say 'I'm ready' when you are ready.").response
         # If unclear -> rephrase and re-ask
         else:
-            OPENING_REPHRASES = [
-                "We’d like to ask you some simple questions to get to know your health background. Your answers are kept confidential and help our team look after you better. Shall we get started?",
-                "To get to know you better and support your care, we’ll ask a few health questions. Your answers stay private. Ready to begin?",
-                "Let's go through some simple health questions. Your information is kept secret and helps us provide the best care. Are you ready to start?"
-            ]
             rephrased_output = random.choice(OPENING_REPHRASES)
             return handler_input.response_builder.speak(rephrased_output).ask(rephrased_output).response
 
@@ -748,9 +1202,9 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     if session_attributes.get("awaiting_followup_confirmation"):
         pending = session_attributes.get("unconfirmed_followup")
 
-        # 🪵 Debugging block
-        logger.info("[DEBUG] Follow-up confirmation pending object:")
-        logger.info(json.dumps(pending, indent=2, default=str))
+        # 🪵 Debugging block (only serialised when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[DEBUG] Follow-up confirmation pending object:\n{json.dumps(pending, indent=2, default=str)}")
 
         required_keys = ["question_id", "followup_index", "question_title", "question_text"]
         missing_keys = [key for key in required_keys if key not in pending]
@@ -783,26 +1237,17 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             session_attributes["current_followup_for"] = None  # <- Added 22/05/2025
 
             # Save the confirmed response
-            patient_data = session_attributes.get("patient_data", {})
-            followup_id = f"{question_id}_{pending['followup_index']}"
-            patient_data[followup_id] = (slot_name, followup_response)
-            session_attributes["patient_data"] = patient_data
-            save_patient_data(session_attributes)
+            # followup_number is the follow-up's position in the question's original list, so IDs stay stable when some are skipped
+            followup_id = f"{question_id}_{pending.get('followup_number', pending['followup_index'])}"
+            session_attributes.setdefault("patient_data", {})[followup_id] = (slot_name, followup_response)
+            save_patient_data(session_attributes, followup_id)
 
             # Fetch next follow-up (if any)
             followup_list = session_attributes.get(f"{question_id}_followups", [])
             next_index = pending["followup_index"] + 1
 
             patient_first_name = session_attributes.get("patient_first_name", "there")
-            confirmation_response = add_short_pause(random.choice([
-                f"Thanks {patient_first_name}! I've saved that information.",
-                f"Got it! Your information has been recorded.",
-                f"Thanks {patient_first_name}! Your response has been saved successfully.",
-                f"Okay, {patient_first_name}. I've noted that.",
-                f"Great! Your information is now stored.",
-                f"Understood! Your details have been saved.",
-                f"Your answer has been updated. Thank you {patient_first_name}!"
-            ]), pause_duration_ms=800)
+            confirmation_response = random.choice(FOLLOWUP_SAVED_TEMPLATES).format(patient_first_name=patient_first_name)
 
             if next_index < len(followup_list):
                 next_followup = followup_list[next_index]
@@ -811,7 +1256,8 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
                     "question_text": next_followup["question"],
                     "question_title": next_followup.get("question_title", "response"),
                     "response": "",
-                    "followup_index": next_index
+                    "followup_index": next_index,
+                    "followup_number": next_followup.get("followup_number", next_index)
                 }
                 session_attributes["current_followup_for"] = question_id
                 session_attributes["awaiting_followup_confirmation"] = False
@@ -823,30 +1269,17 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
                 session_attributes["current_followup_for"] = None
                 session_attributes["awaiting_followup_confirmation"] = False
 
-                # Sync question pointer
-                current_section = session_attributes.get("current_section", 0)
-                session_attributes["current_question"] += 1
-                current_question = session_attributes["current_question"]
-
-                next_question = get_next_question(
-                    session_attributes.get("questions"),
-                    current_section,
-                    current_question
+                next_question, _ = advance_to_next_question(
+                    session_attributes,
+                    questions,
+                    session_attributes.get("current_section", 0),
+                    session_attributes.get("current_question", 0)
                 )
 
                 if next_question:
                     speak_output = confirmation_response + add_short_pause(next_question["question"], pause_duration_ms=1000)
                     return handler_input.response_builder.speak(speak_output).ask(next_question["question"]).response
 
-                # No more questions in this section → move to next section
-                session_attributes["current_section"] += 1
-                session_attributes["current_question"] = 0
-                next_question = get_next_question(session_attributes.get("questions"), session_attributes["current_section"], 0)
-                if next_question:
-                    return handler_input.response_builder.speak(
-                        confirmation_response + add_short_pause(next_question["question"], pause_duration_ms=1000)
-                    ).ask(next_question["question"]).response
-
                 return handler_input.response_builder.speak(questions.get("closing")).response
 
 
@@ -859,6 +1292,7 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
                 "question_text": original,
                 "question_title": pending.get("question_title", "response"),
                 "followup_index": pending["followup_index"],
+                "followup_number": pending.get("followup_number", pending["followup_index"]),
                 "response": ""  # reset the answer
             }
             return handler_input.response_builder.speak(f"Okay, let's try again. {original}").ask(original).response
@@ -867,104 +1301,106 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     # Confirmation Phase
     if session_attributes.get("awaiting_confirmation"):
 
+        # If the question is in Section 2+, start the extra information extraction (unless already done while validating)
+        # alongside the YES/NO check, so a confirmed answer doesn't wait for a second Gemini round-trip.
+        # A reply that is already a plain "no" won't use the extraction, so it isn't started.
+        pending = session_attributes.get("unconfirmed_answer", {})
+        extraction_future = None
+        if pending.get("section", 0) >= 2 and not pending.get("details_extracted") and match_yes_no_locally(slot_value) in (None, "YES"):
+            extraction_future = io_executor.submit(extract_information_with_gemini, pending["question_text"], pending["response"])
+
         # Gemini checks if user confirmed YES/NO
         decision = check_yes_no_with_gemini(slot_value, session_attributes["confirmation_prompt"])
 
+        # The extraction is only used for a confirmed answer; drop it if it hasn't started yet
+        if extraction_future and decision != "YES":
+            extraction_future.cancel()
+
         # If YES -> save the pending answer as 'pending' and reset unconfirmed_answer
         if decision == "YES":
             pending = session_attributes.pop("unconfirmed_answer")
             slot_name = pending["question_title"]
             response_value = pending["response"]
-            # If the question is in Section 2+, do extra information extraction
-            if pending["section"] >= 2:
+            patient_first_name = session_attributes.get("patient_first_name", "there")
+            if extraction_future:
                 try:
-                    response_value = extract_information_with_gemini(pending["question_text"], response_value)
+                    response_value = extraction_future.result()
                 except Exception as e:
                     logger.error(f"Error extracting info: {e}")
 
             # Save it in patient_data, indexed by question ID
-            patient_data = session_attributes.get("patient_data", {})
-            patient_data[pending["question_id"]] = (slot_name, response_value)
-            session_attributes["patient_data"] = patient_data
-            save_patient_data(session_attributes)
+            session_attributes.setdefault("patient_data", {})[pending["question_id"]] = (slot_name, response_value)
+            save_patient_data(session_attributes, pending["question_id"])
 
             # Check if there are follow-up questions
             follow_ups = pending.get("follow_up", [])
-            # If there are follow-up questions, and patient said YES -> ask first follow-up
+            # If there are follow-up questions, and the answer was free text or a YES -> ask first follow-up
             if follow_ups and (
                 pending["question_title"] in FREE_TEXT_SLOTS or
-                (response_value.lower() in ["yes", "yeah", "yep"]) or
-                any([detail is not None, session_attributes.get("unconfirmed_followup")])
+                match_yes_no_locally(response_value) == "YES"
             ):
                 logger.info(f"Starting follow-ups for {pending['question_title']}")
                 
                 # Step 1: Check for pre-answered follow-ups
                 skip_indexes = get_skipped_followups(pending["question_text"], response_value, follow_ups)
 
-                # Step 2: Mark only follow-ups that should be asked
+                # Step 2: Mark only follow-ups that should be asked, remembering their original positions
                 remaining_followups = [
-                    fup for i, fup in enumerate(follow_ups) if i not in skip_indexes
+                    dict(fup, followup_number=i) for i, fup in enumerate(follow_ups) if i not in skip_indexes
                 ]
                 # If all follow-ups are skipped, move to the next main question
                 if not remaining_followups:
                     logger.info(f"All follow-ups skipped based on initial response.")
                     session_attributes["awaiting_confirmation"] = False
-                    session_attributes["current_question"] += 1
-                    current_section = session_attributes.gset("current_section", pending["section"])
-                    current_question = pending["question_index"] + 1
-                    session_attributes["current_question"] = current_question
 
                     # Clear leftover follow-up state from previous question
                     session_attributes.pop("unconfirmed_followup", None)
                     session_attributes["awaiting_followup_confirmation"] = False
                     session_attributes["current_followup_for"] = None
 
-                    next_question = get_next_question(questions, current_section, current_question)
+                    next_question, new_section = advance_to_next_question(
+                        session_attributes,
+                        questions,
+                        session_attributes.get("current_section", pending["section"]),
+                        pending["question_index"]
+                    )
 
                     if not next_question:
-                        session_attributes["current_section"] = current_section + 1
-                        session_attributes["current_question"] = 0
-                        next_question = get_next_question(questions, session_attributes["current_section"], 0)
-
-                        if next_question:
-                            return handler_input.response_builder.speak(
-                                f"Thanks, {patient_first_name}. Let's move to the next section. {next_question['question']}"
-                            ).ask(next_question["question"]).response
-                        else:
-                            return handler_input.response_builder.speak(questions.get("closing")).response
-
-                # Step 3: Store remaining follow-ups
+                        return handler_input.response_builder.speak(questions.get("closing")).response
+                    if new_section:
+                        return handler_input.response_builder.speak(
+                            f"Thanks, {patient_first_name}. Let's move to the next section. {next_question['question']}"
+                        ).ask(next_question["question"]).response
+                    return handler_input.response_builder.speak(next_question["question"]).ask(next_question["question"]).response
+
+                # Step 3: Store remaining follow-ups and start the follow-up series with the first one
+                session_attributes["awaiting_confirmation"] = False
                 session_attributes["current_followup_for"] = pending["question_id"]
                 session_attributes[f"{pending['question_id']}_followups"] = remaining_followups
+                session_attributes["unconfirmed_followup"] = {
+                    "question_id": pending["question_id"],
+                    "question_text": remaining_followups[0]["question"],
+                    "question_title": remaining_followups[0].get("question_title", "response"),
+                    "response": "",
+                    "followup_index": 0,
+                    "followup_number": remaining_followups[0]["followup_number"]
+                }
+                session_attributes["awaiting_followup_confirmation"] = False
                 first_followup = remaining_followups[0]["question"]
                 return handler_input.response_builder.speak(first_followup).ask(first_followup).response
 
             # If no follow-up needed, move to next main question
             session_attributes["awaiting_confirmation"] = False
-            session_attributes["current_question"] = pending["question_index"] + 1  # <- Important fix
-            current_section = pending["section"]
-            next_question = get_next_question(questions, current_section, session_attributes["current_question"])
+            next_question, new_section = advance_to_next_question(session_attributes, questions, pending["section"], pending["question_index"])
 
-            if next_question:
-                patient_first_name = session_attributes.get("patient_first_name", "there") 
-                speak_output = add_short_pause(random.choice([
-                    f"Thanks {patient_first_name}! I've saved your {slot_name.replace('_', ' ')}.",
-                    f"Got it! Your {slot_name.replace('_', ' ')} has been recorded.",
-                    f"Thanks {patient_first_name}! Your {slot_name.replace('_', ' ')} has been saved successfully.",
-                    f"Okay, {patient_first_name}. I've noted your {slot_name.replace('_', ' ')}.",
-                    f"Great! Your {slot_name.replace('_', ' ')} is now stored.",
-                    f"Understood! Your {slot_name.replace('_', ' ')} has been saved.",
-                    f"Your {slot_name.replace('_', ' ')} has been updated. Thank you {patient_first_name}!"
-                ]), pause_duration_ms=800) + add_short_pause(next_question["question"], pause_duration_ms=1000)
+            if next_question and not new_section:
+                speak_output = random.choice(ANSWER_SAVED_TEMPLATES).format(
+                    patient_first_name=patient_first_name,
+                    slot_name=slot_name.replace('_', ' ')
+                ) + add_short_pause(next_question["question"], pause_duration_ms=1000)
                 return handler_input.response_builder.speak(speak_output).ask(next_question["question"]).response
 
-            # No more questions in this section → move to next section
-            session_attributes["current_section"] += 1
-            session_attributes["current_question"] = 0
-            next_question = get_next_question(questions, session_attributes["current_section"], 0)
-
             if next_question:
-                patient_first_name = session_attributes.get("patient_first_name", "there") 
                 return handler_input.response_builder.speak(
                     f"Thank you, {patient_first_name}. Let's move to the next section. {next_question['question']}"
                 ).ask(next_question["question"]).response
@@ -982,20 +1418,16 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             return handler_input.response_builder.speak("Sorry, could you confirm?").ask("Can you confirm?").response
 
     # Handle Repeat Request
-    repeat_check_question = (
-    session_attributes.get("unconfirmed_followup", {}).get("question_text")
-    if session_attributes.get("current_followup_for") and not session_attributes.get("awaiting_followup_confirmation")
-    else current_question_data["question"]
-    )
+    in_followup = session_attributes.get("current_followup_for") and not session_attributes.get("awaiting_followup_confirmation")
 
-    if is_repeat_request(slot_value, repeat_check_question):
-        rephrased = get_rephrased_question(repeat_check_question)
+    # Only an explicit request to hear the question again ("sorry, what?") re-asks it, in simpler words.
+    # Main Yes/No questions get the repeat flag from classify_turn in the same call as the answer.
+    if (in_followup or slot_name not in NO_CONFIRMATION_SLOTS) and match_repeat_locally(slot_value):
+        rephrased = get_rephrased_question(question_text) or question_text
+        return handler_input.response_builder.speak(rephrased).ask(rephrased).response
     
     # Detect if we are in the middle of follow-up series (not yet confirming)
-    if (
-        session_attributes.get("current_followup_for") and
-        not session_attributes.get("awaiting_followup_confirmation")
-    ):
+    if in_followup:
         unconfirmed = session_attributes.get("unconfirmed_followup", {})
         
         # Safety check
@@ -1022,24 +1454,26 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
 
     # Normal validation
     final_response = slot_value.strip() # Clean the answer
+    details_extracted = False  # Set when Gemini has already extracted the key details from the answer
 
     if slot_name in NO_CONFIRMATION_SLOTS:
-        # Use Gemini to determine YES/NO and extract detail
-        decision, detail = parse_yes_no_and_detail(final_response, current_question_data["question"])
+        # Use one Gemini call to detect a repeat request, determine YES/NO and extract detail
+        repeat, decision, detail = classify_turn(final_response, current_question_data["question"])
         logger.info(f"Parsed decision: {decision}, Detail: {detail}")
+        # If the patient asked for a repeat, ask the question again in simpler words without saving or moving on
+        if repeat:
+            rephrased = get_rephrased_question(current_question_data["question"]) or current_question_data["question"]
+            return handler_input.response_builder.speak(rephrased).ask(rephrased).response
 
         # Save main question answer (Yes/No)
-        patient_data = session_attributes.get("patient_data", {})
         question_id = current_question_data["question_id"]
-        patient_data[question_id] = (slot_name, decision.lower())
-
-        session_attributes["patient_data"] = patient_data
-        save_patient_data(session_attributes)
+        session_attributes.setdefault("patient_data", {})[question_id] = (slot_name, decision.lower())
+        save_patient_data(session_attributes, question_id)
 
         # Check for follow-ups
         follow_ups = current_question_data.get("follow_up", [])
         if not isinstance(follow_ups, list): follow_ups = []
-        logger.info(f"[DEBUG] Follow-ups for {slot_name}: {follow_ups}")
+        logger.debug("[DEBUG] Follow-ups for %s: %s", slot_name, follow_ups)
 
         if decision == "YES":
             if detail:
@@ -1073,47 +1507,17 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             else:
                 logger.warning("[Fallback] YES received but no detail and no follow-ups. Skipping to next question.")
 
-        # Move to next main question
-        session_attributes["current_question"] += 1
-
-        # Always ensure questions object is valid
-        questions = session_attributes.get("questions")
-        if not questions or "sections" not in questions:
-            questions = get_questions()
-            if not questions:
-                return handler_input.response_builder.speak("Sorry, I couldn’t retrieve the next question.").ask("Could you try again?").response
-            session_attributes["questions"] = questions
-
-        # Try next question in same section
-        next_question = get_next_question(
-            questions, 
-            session_attributes["current_section"], 
-            session_attributes["current_question"]
-        )
-
-        # If no question left in current section, move to next section
-        if not next_question:
-            session_attributes["current_section"] += 1
-            session_attributes["current_question"] = 0
-            next_question = get_next_question(questions, session_attributes["current_section"], 0)
+        # Move to next main question (or the first question of the next section)
+        next_question, _ = advance_to_next_question(session_attributes, questions, current_section, current_question)
 
         # If no more sections or questions, close the session
         if not next_question:
             closing = questions.get("closing", "Thanks for completing the questionnaire.")
             return handler_input.response_builder.speak(closing).response
 
-        acknowledgements = [
-            "Thanks for letting me know. Next: ",
-            "Alright, noted.  Next: ",
-            "Got it. Next question: ",
-            "Understood.  Next question: ",
-            "No worries, that's helpful to know. Next: ",
-            "Okay, Next: ",
-        ]
-
         # Only insert ack if decision was NO
         if decision == "NO":
-            ack = random.choice(acknowledgements)
+            ack = random.choice(NO_ANSWER_ACKNOWLEDGEMENTS)
             return handler_input.response_builder.speak(f"{ack} {next_question['question']}").ask(next_question["question"]).response
         else:
             return handler_input.response_builder.speak(next_question["question"]).ask(next_question["question"]).response
@@ -1123,12 +1527,13 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
     elif slot_name in FREE_TEXT_SLOTS:
         # If the slot is free text, we can use Gemini to extract structured information
         final_response = extract_information_with_gemini(current_question_data["question"], final_response)
+        details_extracted = True
         # Check if the response is empty after extraction
         if not final_response:
             return handler_input.response_builder.speak("Sorry, I didn't catch that. Could you please repeat?").ask("Could you please repeat?").response
 
     elif slot_name == "date_of_birth":
-        if not re.match(r"^\d{4}-\d{2}-\d{2}$", final_response):
+        if not ISO_DATE_PATTERN.match(final_response):
             is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"])
             if not is_valid:
                 return handler_input.response_builder.speak(result).ask(result).response
@@ -1138,8 +1543,12 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
         parts = final_response.split()
         if len(parts) < 2:
             return handler_input.response_builder.speak("Please tell me your full name.").ask("Could you say your full name?").response
-        session_attributes["patient_first_name"] = parts[0].title()
-        final_response = final_response.title()
+        final_response = capitalise_name(final_response)
+        session_attributes["patient_first_name"] = final_response.split()[0]
+
+    # Alexa matched the answer to one of the slot type's listed values, so the canonical value needs no Gemini validation
+    elif slot_resolved:
+        logger.info(f"Using Alexa's resolved value for {slot_name}: {final_response}")
 
     elif "gender" in slot_name:
         # Gender map
@@ -1155,8 +1564,9 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             final_response = final_response.replace(word, replacement)
 
     elif "email" in slot_name:
-        final_response = final_response.replace(" at ", "@").replace(" dot ", ".").strip().lower()
-        if not re.match(r'^[\w\.-]+@[\w\.-]+\.[a-z]{2,}$', final_response):
+        # Replace spoken "at"/"dot" with symbols in a single pass
+        final_response = SPOKEN_EMAIL_PATTERN.sub(lambda m: SPOKEN_EMAIL_SYMBOLS[m.group(1).lower()], final_response).strip().lower()
+        if not EMAIL_PATTERN.match(final_response):
             is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"])
             if not is_valid:
                 return handler_input.response_builder.speak(result).ask(result).response
@@ -1164,10 +1574,10 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
 
     elif slot_name in ["contact_number", "emergency_contact_phone"]:
         final_response = final_response.replace("oh", "zero")
-        digits_only = re.sub(r"\D", "", final_response)
+        digits_only = NON_DIGIT_PATTERN.sub("", final_response)
         if digits_only.startswith("0"):
             final_response = "+61" + digits_only[1:]
-        if not re.match(r'^\+61[23478]\d{8}$', final_response):
+        if not AU_PHONE_PATTERN.match(final_response):
             is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"])
             if not is_valid:
                 return handler_input.response_builder.speak(result).ask(result).response
@@ -1176,25 +1586,27 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
         parts = final_response.split()
         if len(parts) < 2:
             return handler_input.response_builder.speak("Could you please provide their full name, including last name?").ask("Could you tell me their full name?").response
-        final_response = final_response.title()
+        final_response = capitalise_name(final_response)
 
     elif slot_name == "emergency_contact_relationship":
         final_response = extract_information_with_gemini(current_question_data["question"], final_response, slot_name)
 
     elif slot_name in ["surgeries_date", "immunizations_date"]:
-        slot_value = re.sub(r"['’](\d{2})", r"20\1", slot_value)
+        slot_value = SHORT_YEAR_PATTERN.sub(r"20\1", slot_value)
         # First validate the original final_response
         is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"])
         if not is_valid:
             return handler_input.response_builder.speak(result).ask(result).response
 
         # Now clean the Gemini result
-        cleaned = re.sub(r"['’](\d{2})", r"20\1", result)
-        cleaned = re.sub(r"\b(\w+)\s+\d{1,2}\s+(20\d{2})", r"\1 \2", cleaned)
+        cleaned = SHORT_YEAR_PATTERN.sub(r"20\1", result)
+        cleaned = DAY_BEFORE_YEAR_PATTERN.sub(r"\1 \2", cleaned)
         final_response = cleaned.strip()
 
     else:
-        is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"])
+        # Section 2+ answers are extracted on confirmation, so validate and extract in a single Gemini call
+        details_extracted = current_section >= 2
+        is_valid, result = validate_with_gemini(slot_name, final_response, current_question_data["question"], extract_details=details_extracted)
         if not is_valid:
             return handler_input.response_builder.speak(result).ask(result).response
         final_response = result
@@ -1206,38 +1618,20 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
         "question_text": current_question_data["question"],
         "response": final_response,
         "section": current_section,
-        "question_index": current_question
+        "question_index": current_question,
+        "details_extracted": details_extracted,
+        "follow_up": current_question_data.get("follow_up", [])
     }
     # Set flag awaiting_confirmation = True so next time we expect YES/NO
     session_attributes["awaiting_confirmation"] = True
 
-    # Define a list of free text confirmations
-    STRUCTURED_CONFIRMATIONS = [
-        "Got it. Just to confirm, is your {slot_name} {slot_value}?",
-        "Thanks. Just checking: is your {slot_name} {slot_value}?",
-        "Understood. Can you confirm that your {slot_name} is {slot_value}?",
-        "Thanks. Just to make sure I got it right, is your {slot_name} {slot_value}?",
-        "Okay, your {slot_name} is {slot_value}. Is that correct?",
-        "Thank you. Did I get your {slot_name} right? Is it {slot_value}?"
-    ]
-    # Define a list of free text confirmations
-    FREE_TEXT_CONFIRMATIONS = [
-        "Thanks for sharing. You mentioned: {slot_value}. Is that correct?",
-        "You said: {slot_value}. Can I confirm that?",
-        "Okay, I heard: {slot_value}. Is that correct?",
-        "Just to make sure I got it right, you said: {slot_value}, correct?",
-        "You shared: {slot_value}. Did I hear it right?",
-        "Got it. You mentioned: {slot_value}. Is that correct?",
-        "Thanks. Did I understand correctly: {slot_value}?"
-    ]
-
     # Convert final_response to natural speech if it's a date
     if slot_name in ["surgeries_date", "immunizations_date"]:
         spoken_version = format_date_for_speech(final_response)
     else:
         spoken_version = final_response
 
-    # Ask for Confirmation
+    # Ask for Confirmation (the templates already start with a short pause)
     if slot_name in FREE_TEXT_SLOTS:
         confirmation_prompt = random.choice(FREE_TEXT_CONFIRMATIONS).format(slot_value=spoken_version)
     else:
@@ -1246,8 +1640,6 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
             slot_value=spoken_version
         )
 
-    # Add a pause before the confirmation prompt
-    confirmation_prompt = add_short_pause(confirmation_prompt, pause_duration_ms=800)
     # Save confirmation prompt for checking later
     session_attributes["confirmation_prompt"] = confirmation_prompt
     # Speak the confirmation prompt and ask for a YES/NO response
@@ -1257,14 +1649,14 @@ def capture_answer_intent(handler_input: HandlerInput) -> Response:
 @sb.request_handler(can_handle_func=is_intent_name("AMAZON.FallbackIntent"))
 def fallback_intent_handler(handler_input: HandlerInput) -> Response:
     session_attributes = handler_input.attributes_manager.session_attributes
+    questions = get_questions() or {}
 
     # If waiting for readiness confirmation, repeat opening message
     if session_attributes.get("waiting_for_ready_confirmation"):
-        prompt = session_attributes.get("questions", {}).get("opening", "Are you ready to begin?")
+        prompt = questions.get("opening", "Are you ready to begin?")
         return handler_input.response_builder.speak("Sorry, I didn't catch that. " + prompt).ask(prompt).response
 
     # If mid-question, re-prompt the current question
-    questions = session_attributes.get("questions", {})
     current_section = session_attributes.get("current_section", 0)
     current_question = session_attributes.get("current_question", 0)
     question_data = get_next_question(questions, current_section, current_question)
@@ -0,0 +1,313 @@
+import os
+
+import pytest
+
+pytest.importorskip("ask_sdk_core")
+pytest.importorskip("pymongo")
+pytest.importorskip("google.generativeai")
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("GENAI_API_KEY", "test-key")
+
+from ask_sdk_model import Intent, IntentRequest, RequestEnvelope, Session, Slot  # noqa: E402
+from ask_sdk_model.slu.entityresolution import (  # noqa: E402
+    Resolution, Resolutions, Status, StatusCode, Value, ValueWrapper
+)
+
+import lambda_function  # noqa: E402
+
+FOLLOW_UPS = [
+    {"question": "When were you diagnosed?", "question_title": "medical_conditions_date"},
+    {"question": "Are you being treated for it?", "question_title": "medical_conditions_treatment"},
+]
+
+QUESTIONS = {
+    "opening": "Are you ready to begin?",
+    "closing": "Thank you, that's everything.",
+    "sections": [
+        {"questions": [
+            {
+                "question_id": "q0_0",
+                "question_title": "emergency_contact_relationship",
+                "question": "What is their relationship to you?",
+            },
+        ]},
+        {"questions": [
+            {"question_id": "q1_0", "question_title": "allergies", "question": "Do you have any allergies?"},
+        ]},
+        {"questions": [
+            {
+                "question_id": "q2_0",
+                "question_title": "medical_conditions_list",
+                "question": "What medical conditions do you have?",
+                "follow_up": FOLLOW_UPS,
+            },
+            {
+                "question_id": "q2_1",
+                "question_title": "medications_list",
+                "question": "What medications do you take?",
+            },
+        ]},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Keeps the handler away from MongoDB and Gemini."""
+    monkeypatch.setattr(lambda_function, "get_questions", lambda: QUESTIONS)
+    monkeypatch.setattr(lambda_function, "save_patient_data", lambda *args: None)
+    monkeypatch.setattr(lambda_function, "get_rephrased_question", lambda question: f"Put simply: {question}")
+    monkeypatch.setattr(lambda_function, "extract_information_with_gemini", lambda question, response, *args: response)
+    monkeypatch.setattr(lambda_function, "check_yes_no_with_gemini", lambda *args: "YES")
+
+
+def invoke(session_attributes, slot_value, slot_name="medical_conditions_list", resolved_to=None):
+    """
+    Sends a CaptureAnswerIntent request through the skill and returns the response envelope.
+    resolved_to is the canonical value Alexa's entity resolution matched the slot to, if any.
+    """
+    resolutions = None
+    if resolved_to:
+        resolutions = Resolutions(resolutions_per_authority=[Resolution(
+            authority="amzn1.er-authority.echo-sdk.test",
+            status=Status(code=StatusCode.ER_SUCCESS_MATCH),
+            values=[ValueWrapper(value=Value(name=resolved_to, id=resolved_to.upper()))],
+        )])
+    slot = Slot(name=slot_name, value=slot_value, resolutions=resolutions)
+    envelope = RequestEnvelope(
+        version="1.0",
+        session=Session(new=False, session_id="test-session", attributes=session_attributes),
+        request=IntentRequest(
+            request_id="test-request",
+            intent=Intent(name="CaptureAnswerIntent", slots={slot_name: slot}),
+        ),
+    )
+    return lambda_function.sb.create().invoke(request_envelope=envelope, context=None)
+
+
+def answer_turn_attributes():
+    """Session attributes for a patient about to answer the first Section 2 question."""
+    return {
+        "session_id": 1,
+        "patient_id": 1,
+        "session_start": "2025-05-22T10:00:00",
+        "patient_data": {},
+        "current_section": 2,
+        "current_question": 0,
+    }
+
+
+
+def confirmation_turn_attributes(response):
+    """Session attributes for a patient confirming their answer to the first Section 2 question."""
+    return dict(
+        answer_turn_attributes(),
+        awaiting_confirmation=True,
+        confirmation_prompt=f"You said {response}. Is that correct?",
+        unconfirmed_answer={
+            "question_id": "q2_0",
+            "question_title": "medical_conditions_list",
+            "question_text": "What medical conditions do you have?",
+            "response": response,
+            "section": 2,
+            "question_index": 0,
+            "details_extracted": True,
+            "follow_up": FOLLOW_UPS,
+        },
+    )
+
+
+def test_all_follow_ups_skipped_moves_to_next_question(monkeypatch):
+    monkeypatch.setattr(lambda_function, "get_skipped_followups", lambda *args: [0, 1])
+
+    envelope = invoke(confirmation_turn_attributes("asthma diagnosed in 2010, treated with an inhaler"), "yes")
+    session_attributes = envelope.session_attributes
+    assert "What medications do you take?" in envelope.response.output_speech.ssml
+    assert session_attributes["current_section"] == 2
+    assert session_attributes["current_question"] == 1
+    assert session_attributes["awaiting_confirmation"] is False
+    assert not session_attributes["current_followup_for"]
+    assert "unconfirmed_followup" not in session_attributes
+
+
+
+def test_confirmed_answer_is_saved_before_responding(monkeypatch):
+    saved = []
+    monkeypatch.setattr(lambda_function, "get_skipped_followups", lambda *args: [0, 1])
+    monkeypatch.setattr(
+        lambda_function, "save_patient_data",
+        lambda session_attributes, question_id=None: saved.append((question_id, session_attributes["patient_data"][question_id]))
+    )
+
+    session_attributes = invoke(answer_turn_attributes(), "asthma").session_attributes
+    assert saved == []
+
+    invoke(session_attributes, "yes")
+    assert saved == [("q2_0", ("medical_conditions_list", "asthma"))]
+
+
+def test_explicit_repeat_request_rephrases_without_storing_an_answer():
+    envelope = invoke(answer_turn_attributes(), "sorry, what?")
+    assert "Put simply: What medical conditions do you have?" in envelope.response.output_speech.ssml
+    assert "unconfirmed_answer" not in envelope.session_attributes
+    assert not envelope.session_attributes.get("awaiting_confirmation")
+
+
+def test_unsure_answer_is_confirmed_not_rephrased():
+    envelope = invoke(answer_turn_attributes(), "not sure")
+    assert "Put simply" not in envelope.response.output_speech.ssml
+    assert envelope.session_attributes["awaiting_confirmation"] is True
+    assert envelope.session_attributes["unconfirmed_answer"]["response"] == "not sure"
+
+
+def yes_no_turn_attributes():
+    """Session attributes for a patient about to answer a main Yes/No question."""
+    return dict(answer_turn_attributes(), current_section=1, current_question=0)
+
+
+def test_unsure_yes_no_answer_is_saved_not_rephrased(monkeypatch):
+    saved = []
+    monkeypatch.setattr(lambda_function, "save_patient_data", lambda session_attributes, question_id=None: saved.append(question_id))
+    monkeypatch.setattr(lambda_function, "generate_cached_text", lambda *args: '{"repeat": false, "decision": "UNCLEAR", "detail": ""}')
+
+    envelope = invoke(yes_no_turn_attributes(), "not sure", slot_name="allergies")
+    assert saved == ["q1_0"]
+    assert envelope.session_attributes["patient_data"]["q1_0"] == ("allergies", "unclear")
+    assert "What medical conditions do you have?" in envelope.response.output_speech.ssml
+
+
+def test_yes_no_repeat_request_rephrases_without_saving(monkeypatch):
+    saved = []
+    monkeypatch.setattr(lambda_function, "save_patient_data", lambda session_attributes, question_id=None: saved.append(question_id))
+
+    envelope = invoke(yes_no_turn_attributes(), "can you repeat that", slot_name="allergies")
+    assert saved == []
+    assert "Put simply: Do you have any allergies?" in envelope.response.output_speech.ssml
+    assert envelope.session_attributes["current_section"] == 1
+
+
+def test_confirmed_free_text_answer_starts_follow_ups(monkeypatch):
+    monkeypatch.setattr(lambda_function, "get_skipped_followups", lambda *args: [])
+
+    # Answer turn: the follow-ups travel with the unconfirmed answer
+    envelope = invoke(answer_turn_attributes(), "asthma")
+    session_attributes = envelope.session_attributes
+    assert session_attributes["awaiting_confirmation"] is True
+    assert session_attributes["unconfirmed_answer"]["follow_up"] == FOLLOW_UPS
+
+    # Confirmation turn: the first follow-up is asked and set up as the pending follow-up
+    envelope = invoke(session_attributes, "yes")
+    session_attributes = envelope.session_attributes
+    assert "When were you diagnosed?" in envelope.response.output_speech.ssml
+    assert session_attributes["awaiting_confirmation"] is False
+    assert session_attributes["current_followup_for"] == "q2_0"
+    assert session_attributes["awaiting_followup_confirmation"] is False
+    assert session_attributes["unconfirmed_followup"]["followup_index"] == 0
+    assert session_attributes["unconfirmed_followup"]["followup_number"] == 0
+    assert session_attributes["unconfirmed_followup"]["question_title"] == "medical_conditions_date"
+    assert session_attributes["patient_data"]["q2_0"] == ("medical_conditions_list", "asthma")
+
+
+def test_confirmed_bare_no_skips_follow_ups_without_gemini(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Gemini should not be called for a bare no")
+
+    monkeypatch.setattr(lambda_function, "generate_content_with_retry", fail)
+
+    session_attributes = invoke(answer_turn_attributes(), "no").session_attributes
+    envelope = invoke(session_attributes, "yes")
+    assert "What medications do you take?" in envelope.response.output_speech.ssml
+    assert envelope.session_attributes["current_question"] == 1
+
+
+def test_follow_up_ids_keep_the_original_numbering_when_some_are_skipped(monkeypatch):
+    saved = []
+    monkeypatch.setattr(lambda_function, "get_skipped_followups", lambda *args: [0])
+    monkeypatch.setattr(
+        lambda_function, "save_patient_data",
+        lambda session_attributes, question_id=None: saved.append((question_id, session_attributes["patient_data"][question_id]))
+    )
+
+    # The diagnosis date was already given, so only the treatment follow-up is asked
+    envelope = invoke(confirmation_turn_attributes("asthma since 2010"), "yes")
+    assert "Are you being treated for it?" in envelope.response.output_speech.ssml
+
+    envelope = invoke(envelope.session_attributes, "an inhaler", slot_name="medical_conditions_treatment")
+    assert envelope.session_attributes["awaiting_followup_confirmation"] is True
+
+    envelope = invoke(envelope.session_attributes, "yes", slot_name="medical_conditions_treatment")
+    assert saved == [
+        ("q2_0", ("medical_conditions_list", "asthma since 2010")),
+        ("q2_0_1", ("medical_conditions_treatment", "an inhaler")),
+    ]
+    assert "What medications do you take?" in envelope.response.output_speech.ssml
+
+
+def test_resolved_slot_value_skips_gemini(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Gemini should not be called for a resolved slot value")
+
+    monkeypatch.setattr(lambda_function, "extract_information_with_gemini", fail)
+    monkeypatch.setattr(lambda_function, "validate_with_gemini", fail)
+
+    session_attributes = dict(answer_turn_attributes(), current_section=0, current_question=0)
+    envelope = invoke(session_attributes, "my mum", slot_name="emergency_contact_relationship", resolved_to="mother")
+    assert envelope.session_attributes["unconfirmed_answer"]["response"] == "mother"
+    assert "mother" in envelope.response.output_speech.ssml
+
+
+def test_free_text_slot_keeps_the_patients_words():
+    envelope = invoke(answer_turn_attributes(), "asthma and bad hay fever", resolved_to="asthma")
+    assert envelope.session_attributes["unconfirmed_answer"]["response"] == "asthma and bad hay fever"
+
+
+def test_validation_responses_are_not_cached(monkeypatch):
+    calls = []
+
+    class Result:
+        text = '{"status": "VALID", "value": "1990-11-11"}'
+
+    monkeypatch.setattr(lambda_function, "generate_content_with_retry", lambda *args, **kwargs: calls.append(args) or Result())
+
+    for _ in range(2):
+        assert lambda_function.validate_with_gemini("date_of_birth", "eleven november ninety", "When were you born?") == (True, "1990-11-11")
+    assert len(calls) == 2
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor requires the response to contain a valid `Part`")
+        return self._text
+
+
+class FakeStream:
+    """Stands in for a streamed GenerateContentResponse backed by a cancellable gRPC call."""
+
+    def __init__(self, texts):
+        self._texts = texts
+        self._iterator = self
+        self.read = 0
+        self.cancelled = False
+
+    def __iter__(self):
+        for text in self._texts:
+            self.read += 1
+            yield FakeChunk(text)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_generated_question_skips_empty_chunks_and_closes_the_stream(monkeypatch):
+    stream = FakeStream([None, "Which medications", " do you take? Asking helps us", " plan your care."])
+    monkeypatch.setattr(lambda_function, "generate_content_with_retry", lambda *args, **kwargs: stream)
+
+    assert lambda_function.generate_question_text("prompt") == "Which medications do you take?"
+    assert stream.read == 3
+    assert stream.cancelled